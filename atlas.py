@@ -0,0 +1,160 @@
+"""
+Packs every sprite into a single atlas surface with an index of sprite rects,
+the atlas is cached as raw pixels and rebuilt whenever a source image changes"""
+
+import hashlib
+import json
+import os
+import struct
+
+import pygame
+
+from sprite_slicer import slicer
+
+IMAGES = "assets/images"
+CACHE = "assets/cache/atlas.bin"
+
+# Sprite sheets, name: (file, sprite size, sprites per row, rows)
+SHEETS = {
+    "tiles": ("tiles.png", (16, 16), 8, 2),
+    "faces": ("faces.png", (24, 24), 5, 1),
+    "digits": ("digits.png", (13, 23), 11, 1),
+}
+
+# Whole images scaled down, name: (file, size)
+IMAGES_SCALED = {
+    "logo": ("logo.png", (64, 64)),
+}
+
+# magic, version, atlas width, atlas height, sources digest, index length
+HEADER = struct.Struct("<4sHHH8sI")
+MAGIC = b"ATLS"
+VERSION = 1
+
+
+class Atlas:
+    """
+    Sprites of a single surface, sprites are subsurfaces sharing its pixels,
+    named "sheet/n" for the sprites of a sheet in slicing order, or by the image name"""
+
+    def __init__(
+        self, surface: pygame.Surface, index: dict[str, tuple[int, int, int, int]]
+    ):
+        self.surface = surface
+        self.index = index
+        self.sprites = {}
+
+    def __getitem__(self, name: str) -> pygame.Surface:
+        sprite = self.sprites.get(name)
+        if sprite is None:
+            sprite = self.sprites[name] = self.surface.subsurface(self.index[name])
+        return sprite
+
+    def sequence(self, sheet: str) -> list[pygame.Surface]:
+        """Returns the sprites of a sheet in slicing order"""
+
+        _, _, columns, rows = SHEETS[sheet]
+        return [self[f"{sheet}/{n}"] for n in range(columns * rows)]
+
+    def convert(self):
+        """Converts the atlas to the display format, needs the display mode set"""
+
+        self.surface = self.surface.convert_alpha()
+        self.sprites.clear()
+
+    @classmethod
+    def load(cls, cache: str = CACHE) -> "Atlas":
+        """Loads the cached atlas, building and caching it when missing or stale"""
+
+        digest = sources_digest()
+        try:
+            return cls.read(cache, digest)
+        except (OSError, ValueError):
+            pass
+
+        atlas = build()
+        try:
+            atlas.write(cache, digest)
+        except OSError:
+            pass
+        return atlas
+
+    @classmethod
+    def read(cls, path: str, digest: bytes) -> "Atlas":
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, width, height, cached_digest, index_length = HEADER.unpack_from(
+            data
+        )
+        if magic != MAGIC or version != VERSION or cached_digest != digest:
+            raise ValueError(f"{path} is stale")
+
+        start = HEADER.size + index_length
+        if len(data) - start != width * height * 4:
+            raise ValueError(f"{path} is truncated")
+        index = json.loads(data[HEADER.size : start])
+        pixels = memoryview(data)[start:]
+        surface = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+        return cls(surface, {name: tuple(rect) for name, rect in index.items()})
+
+    def write(self, path: str, digest: bytes):
+        width, height = self.surface.get_size()
+        index = json.dumps(self.index).encode()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, width, height, digest, len(index)))
+            file.write(index)
+            file.write(pygame.image.tobytes(self.surface, "RGBA"))
+
+
+def sources_digest() -> bytes:
+    """Digest of the sizes and modification times of the source images"""
+
+    digest = hashlib.blake2b(digest_size=8)
+    for file, *_ in (*SHEETS.values(), *IMAGES_SCALED.values()):
+        stat = os.stat(os.path.join(IMAGES, file))
+        digest.update(struct.pack("<qq", stat.st_size, stat.st_mtime_ns))
+    return digest.digest()
+
+
+def pack(
+    sizes: dict[str, tuple[int, int]], width: int
+) -> tuple[dict[str, tuple[int, int, int, int]], tuple[int, int]]:
+    """
+    Places rectangles on shelves of the given width, tallest first,
+    returns {name: (x, y, width, height)} and the size of the atlas"""
+
+    index = {}
+    x = y = shelf_height = 0
+    for name in sorted(sizes, key=lambda name: -sizes[name][1]):
+        w, h = sizes[name]
+        if x + w > width:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        index[name] = (x, y, w, h)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return index, (width, y + shelf_height)
+
+
+def build() -> Atlas:
+    """Slices and packs the source images, the atlas keeps their alpha"""
+
+    sprites = {}
+    for sheet, (file, size, columns, rows) in SHEETS.items():
+        image = pygame.image.load(os.path.join(IMAGES, file))
+        for n, sprite in enumerate(slicer(image, size, iter_num=columns, rows=rows)):
+            sprites[f"{sheet}/{n}"] = sprite
+    for name, (file, size) in IMAGES_SCALED.items():
+        image = pygame.image.load(os.path.join(IMAGES, file))
+        sprites[name] = pygame.transform.smoothscale(image, size)
+
+    width = max(256, *(sprite.get_width() for sprite in sprites.values()))
+    index, size = pack({name: s.get_size() for name, s in sprites.items()}, width)
+
+    # Taking the maximum over the transparent surface copies the pixels unblended
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    for name, rect in index.items():
+        surface.blit(sprites[name], rect[:2], special_flags=pygame.BLEND_RGBA_MAX)
+    return Atlas(surface, index)
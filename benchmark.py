@@ -0,0 +1,306 @@
+"""
+Times board and no-guess generation, flood fill, game updates and drawing headlessly,
+over a sweep of board sizes and mine densities, results are saved as JSON and
+compared against a saved baseline,
+python benchmark.py --output results.json --baseline baseline.json --threshold 0.15"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Union
+
+# Drawing needs a display, a dummy one renders in memory
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import generator
+import no_guess
+from atlas import Atlas
+from constants import BoardSettings
+from display_manager import DisplayManager
+from engine import Engine
+from game import Game, GameImages
+from square import SquareState
+
+# Window size of the drawing benchmarks, the same on every machine
+WINDOW = (1280, 800)
+
+# Larger no-guess boards take seconds per first click
+MAX_NO_GUESS_SQUARES = 1000
+
+
+@dataclass
+class Result:
+    benchmark: str
+    board: str
+    runs: int
+    ops_per_s: float
+    best_ms: float
+    p99_ms: float
+    peak_kb: float
+
+
+def get_zero_square(engine: Engine) -> int:
+    """Returns the first square without mines around, a flood fill starts there"""
+
+    for index in range(engine.size):
+        if not engine.mines[index] and not engine.counts[index]:
+            return index
+    return 0
+
+
+def bench_layout(settings: BoardSettings, seed: int) -> Callable[[], None]:
+    def run():
+        generator.generate_layout(
+            settings.rows, settings.columns, settings.mines_count, seed
+        )
+
+    return run
+
+
+def bench_no_guess(
+    settings: BoardSettings, seed: int
+) -> Union[Callable[[], None], None]:
+    """First click of a no-guess game, a new seed every run so p99 sees slow layouts"""
+
+    if settings.rows * settings.columns > MAX_NO_GUESS_SQUARES:
+        return None
+    seeds = itertools.count(seed)
+    start = settings.rows // 2 * settings.columns + settings.columns // 2
+
+    def run():
+        engine = Engine(
+            settings.rows,
+            settings.columns,
+            settings.mines_count,
+            next(seeds),
+            layout_generator=no_guess.generate,
+        )
+        engine.reveal(start)
+
+    return run
+
+
+def bench_flood_fill(settings: BoardSettings, seed: int) -> Callable[[], None]:
+    engine = Engine(settings.rows, settings.columns, settings.mines_count, seed)
+    start = get_zero_square(engine)
+
+    def run():
+        engine.clear()
+        engine.untouched = False
+        engine.reveal(start)
+
+    return run
+
+
+class GameBench:
+    """A game on a dummy display, created once and switched to every board"""
+
+    game = None
+
+    @classmethod
+    def get(cls, settings: BoardSettings, seed: int) -> Game:
+        if cls.game is None:
+            pygame.init()
+            atlas = Atlas.load()
+            display_manager = DisplayManager(atlas["logo"])
+            display_manager.max_size = WINDOW
+            atlas.convert()
+            cls.game = Game(display_manager, GameImages.from_atlas(atlas))
+
+        game = cls.game
+        game.change_dificulty(settings)
+        game.board.reset(seed=seed)
+        engine = game.board.engine
+        engine.untouched = False
+        engine.reveal(get_zero_square(engine))
+        game.update()
+        game.draw(game.display_manager.screen)
+        return game
+
+
+def bench_update(settings: BoardSettings, seed: int) -> Callable[[], None]:
+    game = GameBench.get(settings, seed)
+    return game.update
+
+
+def bench_draw(settings: BoardSettings, seed: int) -> Callable[[], None]:
+    """Full redraw, as after a new game or a resized window"""
+
+    game = GameBench.get(settings, seed)
+    screen = game.display_manager.screen
+
+    def run():
+        game.redraw = True
+        game.draw(screen)
+
+    return run
+
+
+def bench_draw_move(settings: BoardSettings, seed: int) -> Callable[[], None]:
+    """Redraw of a single changed square, as after a flag"""
+
+    game = GameBench.get(settings, seed)
+    screen = game.display_manager.screen
+    engine = game.board.engine
+    index = next(
+        (i for i in range(engine.size) if engine.states[i] != SquareState.REVEAL), 0
+    )
+
+    def run():
+        engine.flag(index)
+        game.draw(screen)
+
+    return run
+
+
+BENCHMARKS = {
+    "layout": bench_layout,
+    "no_guess": bench_no_guess,
+    "flood_fill": bench_flood_fill,
+    "update": bench_update,
+    "draw": bench_draw,
+    "draw_move": bench_draw_move,
+}
+
+
+def measure(run: Callable[[], None], min_time: float, min_runs: int) -> tuple:
+    """
+    Calls run until min_time seconds and min_runs calls have passed,
+    then once more under tracemalloc, which slows it down,
+    returns (runs, ops per second, best milliseconds, p99 milliseconds, peak KiB)"""
+
+    times = []
+    started = time.perf_counter()
+    while len(times) < min_runs or time.perf_counter() - started < min_time:
+        begin = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - begin)
+
+    # Surfaces are allocated by SDL and are not traced, only Python memory is
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p99 = sorted(times)[min(len(times) - 1, len(times) * 99 // 100)]
+    return (
+        len(times),
+        len(times) / sum(times),
+        min(times) * 1000,
+        p99 * 1000,
+        peak / 1024,
+    )
+
+
+def get_settings(size: str, density: float) -> BoardSettings:
+    rows, columns = (int(value) for value in size.split("x"))
+    return BoardSettings(rows, columns, round(rows * columns * density))
+
+
+def compare(results: list[Result], baseline: dict, threshold: float) -> list[str]:
+    """Returns a line for every result slower than the baseline by more than threshold"""
+
+    previous = {
+        (result["benchmark"], result["board"]): result["ops_per_s"]
+        for result in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        ops = previous.get((result.benchmark, result.board))
+        if ops and result.ops_per_s < ops * (1 - threshold):
+            regressions.append(
+                f"{result.benchmark} {result.board}: {result.ops_per_s:.1f} ops/s"
+                f", baseline {ops:.1f} ops/s ({result.ops_per_s / ops - 1:+.1%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--benchmarks", nargs="*", choices=BENCHMARKS, default=list(BENCHMARKS)
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="*",
+        default=["16x30", "100x100", "1000x1000"],
+        metavar="ROWSxCOLUMNS",
+    )
+    parser.add_argument(
+        "--densities",
+        nargs="*",
+        type=float,
+        default=[0.1, 0.2],
+        help="mines per square",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--min-time", type=float, default=0.5, help="seconds spent per benchmark"
+    )
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--output", metavar="FILE", help="saves the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="results to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="slowdown against the baseline counted as a regression",
+    )
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'benchmark':<12}{'board':>20}{'ops/s':>12}{'best ms':>10}"
+        f"{'p99 ms':>10}{'peak KiB':>10}"
+    )
+    for size in args.sizes:
+        for density in args.densities:
+            settings = get_settings(size, density)
+            for name in args.benchmarks:
+                run = BENCHMARKS[name](settings, args.seed)
+                if run is None:
+                    continue
+                result = Result(
+                    name, str(settings), *measure(run, args.min_time, args.min_runs)
+                )
+                results.append(result)
+                print(
+                    f"{result.benchmark:<12}{result.board:>20}"
+                    f"{result.ops_per_s:>12.1f}{result.best_ms:>10.3f}"
+                    f"{result.p99_ms:>10.3f}"
+                    f"{result.peak_kb:>10.0f}"
+                )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "pygame": pygame.version.ver,
+                    "machine": platform.platform(),
+                    "seed": args.seed,
+                    "results": [asdict(result) for result in results],
+                },
+                file,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"regression: {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
-from typing import Union
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import Callable, Union
 
 import pygame
-from random import randint
 
-from square import Square, SquareImages, SquareState
+import generator
+from constants import Colors
+from engine import Engine
+from profiler import Profiler
+from replay import Move, ReplayWriter, apply_move
+from square import SquareEvent, SquareState
+from tile_sets import TileSets
 
 
 @dataclass
@@ -16,158 +22,393 @@ class BoardImages:
 
 
 class Board:
-    def __init__(self, rows, columns, mines_count, sprites):
+    """
+    Pygame frontend of an Engine, draws the squares and handles the mouse,
+    the board is seen through a view which scrolls and zooms, squares are
+    pre-rendered into chunks of chunk_size x chunk_size squares, at most
+    max_chunks of them are kept, least recently drawn go first, a chunk is
+    rendered when it comes into view and only its changed squares afterwards,
+    max_updates - changed squares above which the chunks are rendered again"""
+
+    zoom_levels = (0.5, 1, 2, 3)
+
+    def __init__(
+        self,
+        rows,
+        columns,
+        mines_count,
+        sprites,
+        seed: Union[int, None] = None,
+        safe_first_click: bool = True,
+        layout_generator: Union[Callable[[Engine, int], bytearray], None] = None,
+        tile_sets: Union[TileSets, None] = None,
+        scale: float = 1,
+        chunk_size: int = 32,
+        max_chunks: int = 64,
+        max_updates: int = 4096,
+        profiler: Union[Profiler, None] = None,
+    ):
         self.rows = rows
         self.columns = columns
         self.mines_count = mines_count
         self.sprites = sprites
-        self.board_vector = pygame.math.Vector2(12, 76)
-        self.mines_locations = self.get_random_coordinates(
-            (self.columns, self.rows), iterations=self.mines_count
+        self.tile_sets = tile_sets or TileSets(sprites)
+        self.scale = scale
+        self.profiler = profiler or Profiler()
+        self.board_vector = pygame.math.Vector2(12, 76) * scale
+
+        # View of the board, the whole board is shown until a view size is set
+        self.view_size = None
+        self.scroll = [0, 0]
+        self.scroll_speed = round(16 * scale)
+        self.scrolling = False
+        self.moved = True
+
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.max_updates = max_updates
+        self.chunks = OrderedDict()
+
+        self.set_zoom(1)
+
+        self.engine = Engine(
+            rows, columns, mines_count, seed, safe_first_click, layout_generator
         )
+        self.dirty = set()
+        self.redraw = True
+        for event in (SquareEvent.REVEALED, SquareEvent.FLAGGED, SquareEvent.UNFLAGGED):
+            self.engine.subscribe(event, self.mark_changed)
+        self.hovered = None
+        self.hint = None
+        self.recorder: Union[ReplayWriter, None] = None
+
+        # Mouse buttons held over the board, a chord is played once they are released
+        self.buttons = set()
+        self.chording = False
+        self.chorded = False
+
+    def set_zoom(self, zoom: float):
+        """Scales the squares on top of the board scale"""
+
+        tiles = self.tile_sets.get(self.scale * zoom).tiles
+        self.zoom = zoom
+        self.tile_size = tiles[0].get_size()
+
+        # Revealed images, index is the amount of neighboring mines
+        self.reveal_images = [tiles[1]] + [tiles[n + 7] for n in range(1, 9)]
+        self.mine_image = tiles[5]
+        self.state_images = {
+            SquareState.HIDE: tiles[0],
+            SquareState.HOVER: tiles[1],
+            SquareState.FLAG: tiles[2],
+        }
+        self.chunks.clear()
+        self.moved = True
+
+    def zoom_by(self, step: int, pos: tuple[int, int]):
+        """Changes the zoom level by step keeping the point under pos in place"""
+
+        levels = self.zoom_levels
+        level = min(max(levels.index(self.zoom) + step, 0), len(levels) - 1)
+        if levels[level] == self.zoom:
+            return
+
+        view = self.view
+        old_x, old_y = self.tile_size
+        self.set_zoom(levels[level])
+        tile_x, tile_y = self.tile_size
+        offset_x, offset_y = pos[0] - view.x, pos[1] - view.y
+        self.scroll = [
+            round((self.scroll[0] + offset_x) * tile_x / old_x - offset_x),
+            round((self.scroll[1] + offset_y) * tile_y / old_y - offset_y),
+        ]
+        self.scroll_by(0, 0)
+
+    def set_view_size(self, size: tuple[int, int]):
+        """Limits the screen area of the board, the rest is reached by scrolling"""
+
+        self.view_size = size
+        self.scroll_by(0, 0)
+        self.moved = True
+
+    def scroll_by(self, x: int, y: int):
+        view = self.view
+        tile_x, tile_y = self.tile_size
+        scroll = [
+            min(max(self.scroll[0] + x, 0), self.columns * tile_x - view.width),
+            min(max(self.scroll[1] + y, 0), self.rows * tile_y - view.height),
+        ]
+        if scroll != self.scroll:
+            self.scroll = scroll
+            self.moved = True
 
-        self.squares = pygame.sprite.Group(
-            [[value for value in row] for row in self.generate_grid()]
+    @property
+    def area(self) -> pygame.Rect:
+        """Screen area reserved for the board"""
+
+        if self.view_size is None:
+            return self.view
+        return pygame.Rect(self.board_vector.xy, self.view_size)
+
+    @property
+    def view(self) -> pygame.Rect:
+        """Screen area showing the board"""
+
+        tile_x, tile_y = self.tile_size
+        width, height = self.columns * tile_x, self.rows * tile_y
+        if self.view_size is not None:
+            width = min(width, self.view_size[0])
+            height = min(height, self.view_size[1])
+        return pygame.Rect(self.board_vector.xy, (width, height))
+
+    def get_square_rect(self, index: int) -> pygame.Rect:
+        row, column = divmod(index, self.columns)
+        tile_x, tile_y = self.tile_size
+        return pygame.Rect(
+            self.board_vector.x + column * tile_x - self.scroll[0],
+            self.board_vector.y + row * tile_y - self.scroll[1],
+            tile_x,
+            tile_y,
         )
 
-    def generate_grid(self):
-        grid = [[0] * self.columns for _ in range(self.rows)]
-
-        # Placing mines
-        for x, y in self.mines_locations:
-            grid[x][y] = "x"
-
-        # Placing digits around the mines
-        for x, y in self.mines_locations:
-            neighbors = [
-                (x - 1, y),
-                (x + 1, y),
-                (x - 1, y - 1),
-                (x + 1, y + 1),
-                (x - 1, y + 1),
-                (x + 1, y - 1),
-                (x, y - 1),
-                (x, y + 1),
-            ]
-
-            for x, y in neighbors:
-                try:
-                    if type(grid[x][y]) is int:
-                        grid[x][y] += 1
-                except IndexError:
-                    continue
-
-        output = []
-        tile_x, tile_y = self.sprites.tiles[0].get_size()
-        pos_x, pos_y = self.board_vector.xy
-        for row_num, row_iter in enumerate(grid):
-            new_row = []
-            pos_x = self.board_vector.x
-            for column_num, value in enumerate(row_iter):
-                new_row.append(
-                    Square(
-                        pygame.math.Vector2(pos_x, pos_y),
-                        pygame.math.Vector2(row_num, column_num),
-                        value,
-                        SquareImages.create_instance(value, self.sprites.tiles),
-                    )
-                )
-                pos_x += tile_x
-            output.append(new_row)
-            pos_y += tile_y
+    def get_index(self, pos: tuple[int, int]) -> Union[int, None]:
+        """Returns the flat index of the square under a screen position, or None"""
+
+        if not self.view.collidepoint(pos):
+            return None
 
-        return output
+        tile_x, tile_y = self.tile_size
+        column = int((pos[0] - self.board_vector.x + self.scroll[0]) // tile_x)
+        row = int((pos[1] - self.board_vector.y + self.scroll[1]) // tile_y)
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return row * self.columns + column
+        return None
 
-    def get_random_coordinates(
+    def get_square_image(self, index: int) -> pygame.Surface:
+        state = self.engine.states[index]
+        if index == self.hovered and state == SquareState.HIDE:
+            state = SquareState.HOVER
+        if state == SquareState.REVEAL:
+            if self.engine.mines[index]:
+                return self.mine_image
+            return self.reveal_images[self.engine.counts[index]]
+        return self.state_images[state]
+
+    def reset(
         self,
-        end: tuple[int, int],
-        start: tuple[int, int] = (0, 0),
-        exclude: Union[list[tuple[int, int]], None] = None,
-        iterations: int = 1,
-        duplicate: bool = False,
-    ) -> list[tuple[int, int]]:
-        """
-        Generates random coordinates,
-        end - tuple[x,y] with end positions,
-        start - tuple[x,y] with start positions, by default its (0,0),
-        exclude - a list of coordinates tuple[x,y] to be excluded,
-        iterations - a number of coordinates sets,
-        duplicate - by default its False,
-        returns a list[tuple[int,int]] of generated coordinates"""
-
-        row = randint(start[0], end[1] - 1)
-        collumn = randint(start[1], end[0] - 1)
-
-        if exclude is None:
-            exclude = []
-
-        if duplicate or (row, collumn) not in exclude:
-            exclude.append((row, collumn))
-        else:
-            return self.get_random_coordinates(
-                end, start, exclude, iterations, duplicate
-            )
+        seed: Union[int, None] = None,
+        layout: Union[generator.Layout, None] = None,
+    ):
+        self.engine.new_game(seed, layout)
+        self.buttons.clear()
+        self.chording = self.chorded = False
+        self.dirty.clear()
+        self.redraw = True
+        self.hovered = None
+        self.hint = None
 
-        iterations -= 1
-        if iterations > 0:
-            return self.get_random_coordinates(
-                end, start, exclude, iterations, duplicate
-            )
+    def mark_changed(self, indices: list[int]):
+        """Engine subscriber, the squares are blitted on the next draw"""
+
+        self.dirty.update(indices)
+
+    def set_hovered(self, index: Union[int, None]):
+        if index == self.hovered:
+            return
+
+        for square in (self.hovered, index):
+            if square is not None:
+                self.dirty.add(square)
+        self.hovered = index
+
+    def set_hint(self, index: Union[int, None]):
+        if index == self.hint:
+            return
+
+        for square in (self.hint, index):
+            if square is not None:
+                self.dirty.add(square)
+        self.hint = index
+
+    def dispatch_events(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
+            # The middle button, or the left and right ones together, chord
+            self.buttons.add(event.button)
+            if 2 in self.buttons or {1, 3} <= self.buttons:
+                self.chording = True
+                self.set_hovered(None)
+            elif event.button == 1:
+                self.set_hovered(self.get_index(event.pos))
+
+        elif (
+            event.type == pygame.MOUSEMOTION and event.buttons[0] and not self.chording
+        ):
+            self.set_hovered(self.get_index(event.pos))
+
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (1, 2, 3):
+            self.buttons.discard(event.button)
+            self.set_hovered(None)
+            index = self.get_index(event.pos)
+
+            # The first released button chords, releasing the others does nothing
+            if self.chording:
+                if index is not None and not self.chorded:
+                    self.play_move(Move.CHORD, index)
+                self.chorded = True
+                if not self.buttons:
+                    self.chording = self.chorded = False
+                return
+
+            if index is None:
+                return
+
+            if event.button == 1 and self.engine.states[index] != SquareState.FLAG:
+                self.play_move(Move.REVEAL, index)
+            if event.button == 3:
+                self.play_move(Move.FLAG, index)
+
+        # Wheel scrolls, sideways with shift, zooms with ctrl
+        elif event.type == pygame.MOUSEWHEEL:
+            mods = pygame.key.get_mods()
+            if mods & pygame.KMOD_CTRL:
+                self.zoom_by(event.y, pygame.mouse.get_pos())
+                return
+
+            x, y = event.x, -event.y
+            if mods & pygame.KMOD_SHIFT:
+                x, y = y, x
+            tile_x, tile_y = self.tile_size
+            self.scroll_by(x * 3 * tile_x, y * 3 * tile_y)
+
+    def play_move(self, move: Move, index: int):
+        """Applies a move of the player, writing it to the replay being recorded"""
+
+        if self.recorder is not None:
+            self.recorder.write(move, index)
+        with self.profiler.phase("move"):
+            apply_move(self.engine, move, index)
+
+    def update(self):
+        """Scrolls the view while the arrow keys are held"""
+
+        with self.profiler.phase("board"):
+            keys = pygame.key.get_pressed()
+            x = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+            y = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+            self.scrolling = bool(x or y)
+            if self.scrolling:
+                self.scroll_by(x * self.scroll_speed, y * self.scroll_speed)
+
+    def get_chunk(self, key: tuple[int, int]) -> pygame.Surface:
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = self.render_chunk(key)
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
         else:
-            return exclude
+            self.chunks.move_to_end(key)
+        return chunk
 
-    def reset(self):
-        self.mines_locations = self.get_random_coordinates(
-            (self.columns, self.rows), iterations=self.mines_count
+    def render_chunk(self, key: tuple[int, int]) -> pygame.Surface:
+        chunk_row, chunk_column = key
+        size = self.chunk_size
+        rows = range(chunk_row * size, min((chunk_row + 1) * size, self.rows))
+        columns = range(
+            chunk_column * size, min((chunk_column + 1) * size, self.columns)
         )
-        self.squares = pygame.sprite.Group(
-            [[value for value in row] for row in self.generate_grid()]
+
+        tile_x, tile_y = self.tile_size
+        self.profiler.count("tiles", len(rows) * len(columns))
+        chunk = pygame.Surface((len(columns) * tile_x, len(rows) * tile_y)).convert()
+        chunk.blits(
+            [
+                (
+                    self.get_square_image(row * self.columns + column),
+                    ((column - columns.start) * tile_x, (row - rows.start) * tile_y),
+                )
+                for row in rows
+                for column in columns
+            ],
+            False,
         )
+        return chunk
 
-    def flood_fill(self, square: Square):
-        queue = [square.pos_grid.xy]
-
-        while queue:
-            square_pos = queue.pop()
-
-            x = int(square_pos[0])
-            y = int(square_pos[1])
-
-            neighbours = [
-                (x - 1, y),
-                (x + 1, y),
-                (x - 1, y - 1),
-                (x + 1, y + 1),
-                (x - 1, y + 1),
-                (x + 1, y - 1),
-                (x, y - 1),
-                (x, y + 1),
-            ]
-            for neighbour in neighbours:
-                for square in self.squares:
-                    pos_x = int(square.pos_grid.x)
-                    pos_y = int(square.pos_grid.y)
-
-                    if neighbour[0] == pos_x and neighbour[1] == pos_y:
-                        if (
-                            square.square_type == 0
-                            and square.state != SquareState.REVEAL
-                        ):
-                            square.state = SquareState.REVEAL
-                            queue.append(neighbour)
-                        else:
-                            square.state = SquareState.REVEAL
+    def update_chunks(self, indices: set[int]):
+        """Blits changed squares into the chunks already rendered"""
 
-    def dispatch_events(self, event):
-        for square in self.squares:
-            square.dispatch_event(event)
+        size = self.chunk_size
+        tile_x, tile_y = self.tile_size
+        self.profiler.count("tiles", len(indices))
+        for index in indices:
+            row, column = divmod(index, self.columns)
+            chunk = self.chunks.get((row // size, column // size))
+            if chunk is not None:
+                chunk.blit(
+                    self.get_square_image(index),
+                    (column % size * tile_x, row % size * tile_y),
+                )
 
-    def update(self):
-        self.squares.update()
+    def get_visible_chunks(self) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        """Returns (chunk key, screen position) of every chunk in view"""
+
+        view = self.view
+        tile_x, tile_y = self.tile_size
+        chunk_x, chunk_y = self.chunk_size * tile_x, self.chunk_size * tile_y
+        scroll_x, scroll_y = self.scroll
+        return [
+            (
+                (chunk_row, chunk_column),
+                (
+                    view.x + chunk_column * chunk_x - scroll_x,
+                    view.y + chunk_row * chunk_y - scroll_y,
+                ),
+            )
+            for chunk_row in range(
+                scroll_y // chunk_y, (scroll_y + view.height - 1) // chunk_y + 1
+            )
+            for chunk_column in range(
+                scroll_x // chunk_x, (scroll_x + view.width - 1) // chunk_x + 1
+            )
+        ]
+
+    def draw(self, screen, force: bool = False) -> list[pygame.Rect]:
+        """
+        Blits the squares changed since the last draw, or every chunk in view when
+        forced, after the board was regenerated or the view moved,
+        returns a list[pygame.Rect] of the updated screen areas"""
+
+        indices = self.dirty
+        self.dirty = set()
+
+        if self.redraw or len(indices) > self.max_updates:
+            self.chunks.clear()
+            force = True
+        else:
+            self.update_chunks(indices)
+
+        view = self.view
+        screen.set_clip(view)
+        if force or self.moved:
+            area = self.area
+            if area != view:
+                screen.fill(Colors.light_gray, area)
+            screen.blits(
+                [(self.get_chunk(key), pos) for key, pos in self.get_visible_chunks()],
+                False,
+            )
+            rects = [area]
+        else:
+            rects = []
+            for index in indices:
+                rect = self.get_square_rect(index)
+                if rect.colliderect(view):
+                    screen.blit(self.get_square_image(index), rect)
+                    rects.append(rect.clip(view))
 
-        for square in self.squares:
-            if square.state.name == "REVEAL" and square.square_type == 0:
-                self.flood_fill(square)
+        if self.hint is not None and (force or self.moved or self.hint in indices):
+            pygame.draw.rect(screen, Colors.hint, self.get_square_rect(self.hint), 2)
+        screen.set_clip(None)
 
-    def draw(self, screen):
-        self.squares.draw(screen)
+        self.redraw = False
+        self.moved = False
+        return rects
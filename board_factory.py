@@ -0,0 +1,76 @@
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from random import getrandbits
+from typing import Union
+
+from constants import BoardSettings
+from generator import Layout, generate_layout
+
+
+class BoardFactory:
+    """
+    Generates the mines of the next game in a worker process while the current
+    one is played, so a new game starts without generating anything, the
+    counting works on integers as large as the board which would hold the
+    interpreter lock of a thread for the whole count,
+    boards under max_inline squares are generated at once, faster than
+    a layout is sent over from the process,
+    a single layout of a single BoardSettings is prepared at a time, asking
+    for other settings cancels the pending one"""
+
+    def __init__(self, max_inline: int = 100_000):
+        self.max_inline = max_inline
+        self.executor: Union[ProcessPoolExecutor, None] = None
+        self.settings = None
+        self.pending: Union[Future, None] = None
+
+    def prepare(self, settings: BoardSettings):
+        """Starts generating the next layout unless one of the same settings is pending"""
+
+        if self.pending is not None and self.settings == settings:
+            return
+
+        self.cancel()
+        self.settings = settings
+        args = (settings.rows, settings.columns, settings.mines_count, getrandbits(32))
+        if settings.rows * settings.columns < self.max_inline:
+            self.pending = Future()
+            self.pending.set_result(generate_layout(*args))
+            return
+
+        # The process starts on the first large board, spawned since the display
+        # threads of this one must not be forked
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+        self.pending = self.executor.submit(generate_layout, *args)
+
+    def take(self, settings: BoardSettings) -> Union[Layout, None]:
+        """
+        Returns the prepared layout, waits if it is still being generated,
+        returns None if nothing was prepared for the settings,
+        call prepare afterwards for the game after"""
+
+        if self.pending is None or self.settings != settings:
+            return None
+
+        layout = self.pending.result()
+        self.pending = None
+        return layout
+
+    def cancel(self):
+        """Drops the pending layout, a generation already running is left to finish unused"""
+
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        self.settings = None
+
+    def close(self):
+        """Stops the worker process once a generation running is done"""
+
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -1,4 +1,6 @@
+import argparse
 from dataclasses import dataclass
+from enum import Enum
 
 
 @dataclass(frozen=True)
@@ -10,3 +12,34 @@ class Colors:
     dark_gray: tuple[int, int, int] = (128, 128, 128)
     drop_box_idle: tuple[int, int, int] = (255, 255, 255)
     drop_box_select: tuple[int, int, int] = (241, 241, 241)
+    hint: tuple[int, int, int] = (0, 160, 0)
+
+
+@dataclass(frozen=True)
+class BoardSettings:
+    rows: int
+    columns: int
+    mines_count: int
+
+    def __str__(self) -> str:
+        return f"{self.rows}x{self.columns}x{self.mines_count}"
+
+    @classmethod
+    def parse(cls, text: str) -> "BoardSettings":
+        """Reads ROWSxCOLUMNSxMINES, raises the error argparse reports for a type"""
+
+        try:
+            rows, columns, mines_count = (int(value) for value in text.split("x"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"expected ROWSxCOLUMNSxMINES, got {text!r}"
+            )
+        if rows < 1 or columns < 1 or not 0 <= mines_count < rows * columns:
+            raise argparse.ArgumentTypeError(f"{text!r} is not a playable board")
+        return cls(rows, columns, mines_count)
+
+
+class GameDifficulty(Enum):
+    BEGINNER = BoardSettings(rows=10, columns=10, mines_count=10)
+    INTERMEDIATE = BoardSettings(rows=16, columns=16, mines_count=40)
+    EXPERT = BoardSettings(rows=16, columns=30, mines_count=99)
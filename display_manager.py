@@ -2,12 +2,20 @@ import pygame
 
 
 class DisplayManager:
-    def __init__(self):
+    def __init__(self, logo: pygame.Surface):
         self.SIZE = (180, 245)
         self.screen = pygame.display.set_mode(self.SIZE)
-        self.logo = pygame.image.load("assets/images/logo.png").convert_alpha()
 
-    def set_mode(self, width, height):
+        # Windows are kept within the desktop, leaving room for its panels
+        width, height = pygame.display.get_desktop_sizes()[0]
+        self.max_size = (width * 9 // 10, height * 9 // 10)
+        self.logo = logo
+        self.background = self.create_background()
+
+    def set_mode(self, width, height) -> tuple[int, int]:
+        """Opens the window, up to max_size, returns its size"""
+
+        width, height = min(width, self.max_size[0]), min(height, self.max_size[1])
         pygame.display.quit()
 
         self.screen = pygame.display.set_mode((width, height))
@@ -15,5 +23,10 @@ class DisplayManager:
         pygame.display.set_caption("Minesweeper")
         pygame.display.set_icon(self.logo)
 
-    def draw(self):
-        self.screen.fill("Red")
+        self.background = self.create_background()
+        return width, height
+
+    def create_background(self) -> pygame.Surface:
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill("Red")
+        return background
@@ -0,0 +1,287 @@
+from array import array
+from collections import deque
+from random import Random, getrandbits
+from typing import Callable, Iterable, Union
+
+import generator
+from square import SquareEvent, SquareState
+
+# States read once, looking an Enum member up on its class is slow in the square loops
+HIDE = SquareState.HIDE
+REVEAL = SquareState.REVEAL
+FLAG = SquareState.FLAG
+
+# Byte translation table marking the revealed squares with 1
+REVEALED = bytes(state == REVEAL for state in range(256))
+
+
+class Engine:
+    """
+    Minesweeper rules without any display,
+    the board is kept in flat buffers, one byte per square, index = row * columns + column,
+    mines - 1 where a mine is placed,
+    counts - a number of neighboring mines,
+    states - SquareState of the square,
+    a move notifies the subscribers of every SquareEvent it caused once, with the
+    list of squares, bulk changes like a new game are not notified,
+    layout - mines generated ahead of time, placed instead of seeding new ones"""
+
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        mines_count: int,
+        seed: Union[int, None] = None,
+        safe_first_click: bool = True,
+        layout_generator: Union[Callable[["Engine", int], bytearray], None] = None,
+        layout: Union[generator.Layout, None] = None,
+    ):
+        self.rows = rows
+        self.columns = columns
+        self.mines_count = mines_count
+        self.safe_first_click = safe_first_click
+        self.layout_generator = layout_generator
+        self.subscribers = {event: [] for event in SquareEvent}
+        self.new_game(seed, layout)
+
+    @property
+    def size(self) -> int:
+        return self.rows * self.columns
+
+    @property
+    def won(self) -> bool:
+        return not self.mine_hit and self.revealed_count == self.size - self.mines_count
+
+    @property
+    def lost(self) -> bool:
+        return self.mine_hit
+
+    @property
+    def mines_locations(self) -> array:
+        """Flat indices of the mines, listed on demand so no per-mine storage is kept"""
+
+        return generator.mine_indices(self.mines)
+
+    def subscribe(self, event: SquareEvent, callback: Callable[[list[int]], None]):
+        """Calls back with the squares of the event after every move causing it"""
+
+        self.subscribers[event].append(callback)
+
+    def notify(self):
+        """Hands the squares changed since the last notification to the subscribers"""
+
+        # Emptied before the calls, moves made by a subscriber are notified on their own
+        pending = self.pending
+        for event, indices in pending.items():
+            if indices:
+                pending[event] = []
+                for callback in self.subscribers[event]:
+                    callback(indices)
+
+    def get_neighbors(self, index: int) -> list[int]:
+        columns = self.columns
+        row, column = divmod(index, columns)
+
+        # Squares away from the edges have all eight neighbors
+        if 0 < row < self.rows - 1 and 0 < column < columns - 1:
+            above, below = index - columns, index + columns
+            return [
+                above - 1,
+                above,
+                above + 1,
+                index - 1,
+                index + 1,
+                below - 1,
+                below,
+                below + 1,
+            ]
+
+        output = []
+        for n_row in range(max(row - 1, 0), min(row + 2, self.rows)):
+            for n_column in range(max(column - 1, 0), min(column + 2, self.columns)):
+                if n_row != row or n_column != column:
+                    output.append(n_row * self.columns + n_column)
+        return output
+
+    def place_mines(self, seed: Union[int, None] = None, exclude: list[int] = ()):
+        """
+        Single entry point for mines placement,
+        seed - seed of the board random generator, keeps the current one by default,
+        exclude - flat indices of squares which never get a mine"""
+
+        if seed is not None:
+            self.seed = seed
+            self.rng = Random(seed)
+
+        self.set_mines(
+            generator.place_mines(
+                self.rows, self.columns, self.mines_count, self.rng, exclude
+            )
+        )
+
+    def set_mines(self, mines: bytearray):
+        self.mines = mines
+        self.counts = generator.count_neighbors(self.mines, self.rows, self.columns)
+
+    def get_safe_zone(self, index: int) -> list[int]:
+        """
+        Returns the squares excluded from mines on the first click,
+        the square with its neighbors, or just the square on dense boards"""
+
+        zone = [index] + self.get_neighbors(index)
+        for exclude in (zone, zone[:1], []):
+            if self.size - len(exclude) >= self.mines_count:
+                return exclude
+
+    def new_game(
+        self,
+        seed: Union[int, None] = None,
+        layout: Union[generator.Layout, None] = None,
+    ):
+        """
+        Places new mines and hides every square, a random seed is used by default,
+        layout - mines generated ahead of time, used instead of placing new ones"""
+
+        self.untouched = True
+        if layout is not None:
+            self.seed, self.rng = layout.seed, layout.rng
+            self.mines = layout.mines
+            self.counts = layout.counts
+        else:
+            self.place_mines(seed if seed is not None else getrandbits(32))
+        self.clear()
+
+    def clear(self):
+        """Hides every square and resets the game counters, the mines stay"""
+
+        self.states = bytearray(self.size)
+        self.pending = {event: [] for event in SquareEvent}
+        self.revealed_count = 0
+        self.flagged_count = 0
+        self.mine_hit = False
+
+    def set_states(self, states: bytearray):
+        """Replaces the state of every square at once, the game counters are recounted"""
+
+        self.states = states
+        self.pending = {event: [] for event in SquareEvent}
+        self.revealed_count = states.count(REVEAL)
+        self.flagged_count = states.count(FLAG)
+        revealed = states.translate(REVEALED)
+        self.mine_hit = bool(
+            int.from_bytes(revealed, "little") & int.from_bytes(self.mines, "little")
+        )
+
+    def set_state(self, index: int, state: SquareState):
+        """Changes the state of a square, keeping the game counters up to date"""
+
+        previous = self.states[index]
+        if previous == state:
+            return
+
+        pending = self.pending
+        if previous == REVEAL:
+            self.revealed_count -= 1
+        elif previous == FLAG:
+            self.flagged_count -= 1
+            pending[SquareEvent.UNFLAGGED].append(index)
+
+        if state == REVEAL:
+            self.revealed_count += 1
+            pending[SquareEvent.REVEALED].append(index)
+            if self.mines[index]:
+                self.mine_hit = True
+                pending[SquareEvent.MINE_HIT].append(index)
+        elif state == FLAG:
+            self.flagged_count += 1
+            pending[SquareEvent.FLAGGED].append(index)
+
+        self.states[index] = state
+
+    def flag(self, index: int):
+        """Toggles the flag of a hidden square"""
+
+        if self.states[index] == FLAG:
+            self.set_state(index, HIDE)
+        elif self.states[index] != REVEAL:
+            self.set_state(index, FLAG)
+        self.notify()
+
+    def flag_mines(self):
+        """Flags every mine, used once the game is won"""
+
+        for index in self.mines_locations:
+            self.set_state(index, FLAG)
+        self.notify()
+
+    def reveal(self, index: int):
+        if self.states[index] == REVEAL:
+            return
+
+        # Moving mines out of the first clicked square and its neighbors,
+        # or handing the layout over to the generator which needs the first click
+        if self.untouched:
+            self.untouched = False
+            safe_zone = self.get_safe_zone(index)
+            if self.layout_generator is not None:
+                self.set_mines(self.layout_generator(self, index))
+            elif self.safe_first_click and any(self.mines[i] for i in safe_zone):
+                self.place_mines(exclude=safe_zone)
+
+        self.set_state(index, REVEAL)
+        if not self.mines[index] and self.counts[index] == 0:
+            self.flood_fill(index)
+        self.notify()
+
+    def flood_fill(self, *indices: int):
+        """
+        Reveals the regions around revealed empty squares in a single pass,
+        every square is visited once, only empty squares are queued"""
+
+        queue = deque(indices)
+
+        while queue:
+            index = queue.popleft()
+
+            for neighbour in self.get_neighbors(index):
+                if self.states[neighbour] == REVEAL:
+                    continue
+
+                self.set_state(neighbour, REVEAL)
+                if self.counts[neighbour] == 0 and not self.mines[neighbour]:
+                    queue.append(neighbour)
+
+    def chord(self, index: int):
+        """
+        Reveals the hidden neighbors of a revealed number at once,
+        only when the number of flags around it matches the number,
+        the empty ones among them are flood filled together"""
+
+        states = self.states
+        if states[index] != REVEAL or self.mines[index]:
+            return
+
+        flags = 0
+        hidden = []
+        for neighbour in self.get_neighbors(index):
+            if states[neighbour] == FLAG:
+                flags += 1
+            elif states[neighbour] == HIDE:
+                hidden.append(neighbour)
+        if flags != self.counts[index] or not hidden:
+            return
+
+        self.reveal_many(hidden)
+
+    def reveal_many(self, indices: Iterable[int]):
+        """
+        Reveals squares at once, the empty ones among them are flood filled together,
+        the first click is expected to be made already"""
+
+        indices = [index for index in indices if self.states[index] != REVEAL]
+        for index in indices:
+            self.set_state(index, REVEAL)
+        self.flood_fill(
+            *(i for i in indices if not self.mines[i] and self.counts[i] == 0)
+        )
+        self.notify()
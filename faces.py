@@ -23,27 +23,38 @@ class FacesStates(Enum):
 
 
 class Faces:
-    def __init__(self, sprites: FacesImages):
+    def __init__(self, sprites: FacesImages, scale: float = 1):
         self.sprites = sprites
+        self.scale = scale
+        self.images = {
+            FacesStates.NEW_GAME: sprites.idle,
+            FacesStates.IDLE: sprites.idle,
+            FacesStates.PRESSED: sprites.pressed,
+            FacesStates.ACTION: sprites.action,
+            FacesStates.WON: sprites.won,
+            FacesStates.LOST: sprites.lost,
+        }
         self.image = sprites.idle
         self.rect = self.image.get_rect()
         self.pressed = False
+        self.drawn = None
 
         self.current_state = FacesStates.IDLE
         self.previous_state = FacesStates.IDLE
 
-        self.action_collision_field = pygame.display.get_surface().get_rect(
-            topleft=(0, 18)
-        )
+        # Defined from the screen size on update
+        self.action_collision_field = pygame.Rect(0, round(18 * scale), 0, 0)
 
     def change_state(self, state: FacesStates):
         if state is not self.current_state:
             self.previous_state = self.current_state
             self.current_state = state
+            self.image = self.images[state]
 
     def revert_state(self):
         if self.current_state is not self.previous_state:
             self.current_state = self.previous_state
+            self.image = self.images[self.current_state]
 
     def dispatch_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -71,10 +82,12 @@ class Faces:
         mouse_pos = pygame.mouse.get_pos()
 
         # Centering face
-        self.rect.center = (screen.get_width() / 2, 48)
+        self.rect.center = (screen.get_width() / 2, round(48 * self.scale))
 
         # Defining action collision field
-        self.action_collision_field = screen.get_rect(topleft=(0, 18))
+        self.action_collision_field = screen.get_rect(
+            topleft=(0, round(18 * self.scale))
+        )
 
         # Handling faces collision effects when pressd
         if self.pressed:
@@ -83,10 +96,9 @@ class Faces:
             else:
                 self.revert_state()
 
-        # Seletcting appropriate image by the current state
-        self.image = getattr(
-            self.sprites, self.current_state.name.lower(), self.sprites.idle
-        )
-
-    def draw(self, screen):
-        screen.blit(self.image, self.rect)
+    def draw(self, screen, force: bool = False) -> list[pygame.Rect]:
+        drawn = (self.image, self.rect.topleft)
+        if not force and self.drawn == drawn:
+            return []
+        self.drawn = drawn
+        return [screen.blit(self.image, self.rect)]
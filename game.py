@@ -1,35 +1,40 @@
-from dataclasses import dataclass, field
+import os
+import time
+from dataclasses import dataclass
 from enum import Enum, auto
+from typing import Iterable, Union
 
 import pygame
 
+import no_guess
 import widgets
+from atlas import Atlas
 from board import Board, BoardImages
+from board_factory import BoardFactory
 from faces import Faces, FacesImages, FacesStates
 from display_manager import DisplayManager
-from constants import Colors
-from sprite_slicer import slicer
+from profiler import Overlay, Profiler
+from replay import Replay, ReplayPlayer, ReplayWriter
+from snapshot import Snapshot
+from constants import BoardSettings, Colors, GameDifficulty
+from solver import Solver
+from square import SquareEvent
+from tile_sets import TileSets
 
 
 @dataclass
 class GameImages:
-    spritesheet_tiles: pygame.Surface
-    spritesheet_faces: pygame.Surface
-    spritesheet_digits: pygame.Surface
-    tiles: list[pygame.Surface] = field(init=False)
-    faces: list[pygame.Surface] = field(init=False)
-    digits: list[pygame.Surface] = field(init=False)
-
-    def __post_init__(self):
-        self.tiles = slicer(self.spritesheet_tiles, (16, 16), iter_num=8, rows=2)
-        self.faces = slicer(self.spritesheet_faces, (24, 24), iter_num=5)
-        self.digits = slicer(self.spritesheet_digits, (13, 23), iter_num=11)
-
-
-class GameDifficulty(Enum):
-    BEGINNER = auto()
-    INTERMEDIATE = auto()
-    EXPERT = auto()
+    tiles: list[pygame.Surface]
+    faces: list[pygame.Surface]
+    digits: list[pygame.Surface]
+
+    @classmethod
+    def from_atlas(cls, atlas: Atlas) -> "GameImages":
+        return cls(
+            tiles=atlas.sequence("tiles"),
+            faces=atlas.sequence("faces"),
+            digits=atlas.sequence("digits"),
+        )
 
 
 class GameState(Enum):
@@ -40,93 +45,303 @@ class GameState(Enum):
 
 
 class Game:
-    def __init__(self, display_manager: DisplayManager, sprites: GameImages):
+    def __init__(
+        self,
+        display_manager: DisplayManager,
+        sprites: GameImages,
+        custom_difficulties: Iterable[BoardSettings] = (),
+        scale: float = 1,
+        record_dir: Union[str, None] = None,
+        snapshot_path: str = "snapshot.mss",
+        profiler: Union[Profiler, None] = None,
+        show_overlay: bool = False,
+    ):
         self.sprites = sprites
         self.display_manager = display_manager
+        self.scale = scale
+        self.record_dir = record_dir
+        self.snapshot_path = snapshot_path
+        self.profiler = profiler or Profiler()
+        # A profiler enabled only for tracing times the frames without showing them
+        self.overlay = (
+            Overlay(self.profiler, scale)
+            if show_overlay and self.profiler.enabled
+            else None
+        )
+        self.replay_player = None
         self.game_state = GameState.IDLE
+        self.redraw = True
+        self.drawn_menus = (False, False)
+
+        # Board settings by their Game menu option
+        self.difficulties = {
+            difficulty.name.capitalize(): difficulty.value
+            for difficulty in GameDifficulty
+        }
+        self.difficulties.update(
+            (str(settings), settings) for settings in custom_difficulties
+        )
 
         # Dropboxes
-        self.dbox_game_options = ("New game", "Beginner", "Intermediate", "Expert")
+        s = self.scaled
+        self.dbox_game_options = ("New game", *self.difficulties)
         self.dbox_game = widgets.DropBox(
-            pygame.Rect(0, 0, 45, 18),
+            pygame.Rect(0, 0, s(45), s(18)),
             "Game",
-            pygame.font.SysFont("Arial", 12),
+            pygame.font.SysFont("Arial", s(12)),
             self.dbox_game_options,
             (Colors.drop_box_idle, Colors.drop_box_select),
         )
-        self.dbox_help_options = ("One", "Two", "Three", "Four")
+        # Help menu actions by their option
+        self.help_actions = {
+            "Hint": self.toggle_hint,
+            "No guess": self.toggle_no_guess,
+            "Save": self.save_snapshot,
+            "Load": self.load_snapshot,
+        }
+        self.dbox_help_options = tuple(self.help_actions)
         self.dbox_help = widgets.DropBox(
-            pygame.Rect(45, 0, 40, 18),
+            pygame.Rect(s(45), 0, s(40), s(18)),
             "Help",
-            pygame.font.SysFont("Arial", 12),
+            pygame.font.SysFont("Arial", s(12)),
             self.dbox_help_options,
             (Colors.drop_box_idle, Colors.drop_box_select),
         )
 
-        self.wtimer = widgets.Timer(
-            widgets.TimerCountImages(digits=self.sprites.digits[1:])
-        )
-
-        self.faces = Faces(FacesImages(*self.sprites.faces))
-
+        # Scaled copies of the sprites, shared with the board zoom levels
         self.board_images = BoardImages(
             minus=self.sprites.digits[0],
             digits=self.sprites.digits[1:],
             tiles=self.sprites.tiles,
             faces=self.sprites.faces,
         )
+        self.tile_sets = TileSets(self.board_images)
+        images = self.tile_sets.get(scale)
 
-        self.board_difficulties = {
-            GameDifficulty.BEGINNER: Board(
-                rows=10, columns=10, mines_count=10, sprites=self.board_images
-            ),
-            GameDifficulty.INTERMEDIATE: Board(
-                rows=16, columns=16, mines_count=40, sprites=self.board_images
-            ),
-            GameDifficulty.EXPERT: Board(
-                rows=16, columns=30, mines_count=99, sprites=self.board_images
-            ),
-        }
+        self.wtimer = widgets.Timer(
+            widgets.TimerCountImages(digits=images.digits), scale
+        )
 
-        self.difficulty = GameDifficulty.BEGINNER
-        self.board = self.board_difficulties[self.difficulty]
+        self.faces = Faces(FacesImages(*images.faces), scale)
 
-        self.display_manager.set_mode(
-            16 * self.board.columns + 20, 16 * self.board.rows + 85
-        )
+        self.show_hint = False
+        self.no_guess = False
+
+        # Only the board being played exists, another one is created on selection
+        self.difficulty = GameDifficulty.BEGINNER.value
+        self.board = self.create_board(self.difficulty)
+        self.solver = Solver(self.board.engine)
+
+        # Mines of the next game are generated in the background
+        self.board_factory = BoardFactory()
+        self.board_factory.prepare(self.difficulty)
+
+        self.layouts = {}
+        self.set_window()
 
         self.mine_counter = widgets.MineCounter(
             self.board.mines_count,
-            widgets.MineCountImages(
-                minus=self.sprites.digits[0], digits=self.sprites.digits[1:]
-            ),
+            widgets.MineCountImages(minus=images.minus, digits=images.digits),
+            scale,
         )
+        self.start_recording()
+
+    def create_board(self, settings: BoardSettings) -> Board:
+        """Creates the board of the settings, the game follows the events of its engine"""
+
+        board = Board(
+            rows=settings.rows,
+            columns=settings.columns,
+            mines_count=settings.mines_count,
+            sprites=self.board_images,
+            tile_sets=self.tile_sets,
+            scale=self.scale,
+            layout_generator=no_guess.generate if self.no_guess else None,
+            profiler=self.profiler,
+        )
+        engine = board.engine
+        engine.subscribe(SquareEvent.REVEALED, self.on_revealed)
+        engine.subscribe(SquareEvent.FLAGGED, self.on_flags_changed)
+        engine.subscribe(SquareEvent.UNFLAGGED, self.on_flags_changed)
+        engine.subscribe(SquareEvent.MINE_HIT, self.on_mine_hit)
+        return board
+
+    def on_revealed(self, indices: list[int]):
+        """Starts the timer on the first revealed square, ends the game once it is won"""
 
-    def new_game(self):
+        if self.game_state is GameState.IDLE:
+            self.wtimer.start()
+            self.game_state = GameState.PLAYING
+
+        if self.game_state is GameState.PLAYING and self.board.engine.won:
+            print("You won")
+            self.game_state = GameState.WON
+            self.faces.change_state(FacesStates.WON)
+            self.wtimer.end()
+            self.stop_recording()
+            self.board.engine.flag_mines()
+
+    def on_flags_changed(self, indices: list[int]):
+        """Counts the marked mines"""
+
+        engine = self.board.engine
+        self.mine_counter.update(self.board.mines_count - engine.flagged_count)
+        if engine.flagged_count == self.board.mines_count and not engine.won:
+            print("All flaged")
+
+    def on_mine_hit(self, indices: list[int]):
+        if self.game_state is not GameState.LOST:
+            self.game_state = GameState.LOST
+            self.faces.change_state(FacesStates.LOST)
+            self.wtimer.end()
+            self.stop_recording()
+
+    def new_game(self, reset_board: bool = True):
         self.game_state = GameState.IDLE
         self.faces.change_state(FacesStates.IDLE)
-        self.board.reset()
+        self.stop_recording()
+        self.replay_player = None
+        if reset_board:
+            self.board.reset(layout=self.board_factory.take(self.difficulty))
+        self.board_factory.prepare(self.difficulty)
         self.wtimer.reset()
+        self.mine_counter.update(self.board.mines_count)
+        self.start_recording()
+
+    def start_recording(self):
+        if self.record_dir is None:
+            return
 
-    def change_dificulty(self):
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.board.engine.seed}.msr"
+        self.board.recorder = ReplayWriter(
+            os.path.join(self.record_dir, name), self.board.engine, self.no_guess
+        )
+
+    def stop_recording(self):
+        if self.board.recorder is not None:
+            self.board.recorder.close()
+            self.board.recorder = None
+
+    def play_replay(self, replay: Replay):
+        """Plays a recorded game at real speed, the board ignores the mouse meanwhile"""
+
+        self.no_guess = replay.no_guess
+        self.change_dificulty(replay.settings)
+        self.stop_recording()
+        self.board.engine.safe_first_click = replay.safe_first_click
+        self.board.reset(seed=replay.seed)
+        self.replay_player = ReplayPlayer(replay)
+
+    def save_snapshot(self):
+        snapshot = Snapshot.capture(
+            self.board.engine, self.wtimer.timer.counting, self.no_guess
+        )
+        snapshot.save(self.snapshot_path)
+
+    def load_snapshot(self, path: Union[str, None] = None):
+        """
+        Continues a saved game on a board of its settings, the snapshot_path by default,
+        the current game goes on when the snapshot cannot be read"""
+
+        path = path or self.snapshot_path
+        try:
+            snapshot = Snapshot.load(path)
+        except (OSError, ValueError) as error:
+            print(f"Cannot load the snapshot: {error}")
+            return
+
+        self.no_guess = snapshot.no_guess
+        self.change_dificulty(snapshot.settings)
+
+        # Moves made before the snapshot are unknown, the game is not recorded
+        self.stop_recording()
+        engine = self.board.engine
+        snapshot.restore(engine)
+        self.board.redraw = True
+        self.mine_counter.update(self.board.mines_count - engine.flagged_count)
+
+        if engine.lost:
+            self.faces.change_state(FacesStates.LOST)
+            self.game_state = GameState.LOST
+        elif engine.won:
+            self.faces.change_state(FacesStates.WON)
+            self.game_state = GameState.WON
+        elif engine.revealed_count:
+            self.game_state = GameState.PLAYING
+
+        # The timer continues from the saved time, finished games only show it
+        if self.game_state is GameState.PLAYING:
+            self.wtimer.start(snapshot.elapsed)
+        else:
+            self.wtimer.timer.counting = snapshot.elapsed
+
+    def change_dificulty(self, settings: BoardSettings):
         self.game_state = GameState.IDLE
+        self.difficulty = settings
+
+        # The previous board is released, the new one starts with fresh mines
+        self.stop_recording()
+        self.board_factory.cancel()
+        self.board = self.create_board(settings)
+        self.solver = Solver(self.board.engine)
+
+        self.set_window()
+        self.faces.update()
+        self.redraw = True
 
-        dificulty = self.dbox_game.get_current_option()
-        self.difficulty = getattr(GameDifficulty, dificulty.upper())
+        self.new_game(reset_board=False)
 
-        self.board = self.board_difficulties[self.difficulty]
+    def set_window(self):
+        """Sizes the window to the board, larger boards are scrolled"""
 
-        width, height = 16 * self.board.columns + 20, 16 * self.board.rows + 85
-        self.display_manager.set_mode(width, height)
+        tile_x, tile_y = self.board.tile_size
+        margin_x, margin_y = self.scaled(20), self.scaled(85)
+        width, height = self.display_manager.set_mode(
+            tile_x * self.board.columns + margin_x, tile_y * self.board.rows + margin_y
+        )
+        self.board.set_view_size((width - margin_x, height - margin_y))
+        self.layout = self.get_layout((width, height))
+
+    def toggle_hint(self):
+        self.show_hint = not self.show_hint
 
+    def toggle_no_guess(self):
+        """Switches to layouts solvable without guessing and back"""
+
+        self.no_guess = not self.no_guess
+        self.board.engine.layout_generator = (
+            no_guess.generate if self.no_guess else None
+        )
         self.new_game()
 
+    def is_idle(self) -> bool:
+        """Nothing changes on screen without an input event while the timer is stopped"""
+
+        return (
+            not self.wtimer.timer.running
+            and not self.board.scrolling
+            and self.replay_player is None
+        )
+
     def dispatch_events(self, event):
         if not self.dbox_game.draw_menu and not self.dbox_help.draw_menu:
             self.faces.dispatch_event(event)
-            if self.game_state not in (GameState.WON, GameState.LOST):
+            # Finished and replayed games take no moves, the wheel still scrolls and zooms
+            if event.type == pygame.MOUSEWHEEL or (
+                self.game_state not in (GameState.WON, GameState.LOST)
+                and self.replay_player is None
+            ):
                 self.board.dispatch_events(event)
 
+        # Showing and hiding the profiler overlay
+        if (
+            self.overlay is not None
+            and event.type == pygame.KEYDOWN
+            and event.key == pygame.K_F3
+        ):
+            self.overlay.visible = not self.overlay.visible
+            self.redraw = True
+
         # Dropbox events
         self.dbox_game.dispatch_event(event)
         self.dbox_help.dispatch_event(event)
@@ -136,34 +351,27 @@ class Game:
         self.dbox_game.update()
         self.dbox_help.update()
 
-        # Count marked mines
-        marked_count = sum(
-            [True for square in self.board.squares if square.state.name == "FLAG"]
-        )
-        self.mine_counter.update(self.board.mines_count - marked_count)
-
         self.wtimer.update()
 
-        if self.game_state is GameState.IDLE:
-            # Starting timer on first pressed square/tile
-            if not self.wtimer.timer.running and any(
-                [True for square in self.board.squares if square.state.name == "REVEAL"]
-            ):
-                self.wtimer.start()
-                self.game_state = GameState.PLAYING
+        # Replayed moves
+        if self.replay_player is not None:
+            for move, index in self.replay_player.get_due():
+                self.board.play_move(move, index)
+            if self.replay_player.done:
+                self.replay_player = None
 
         if not self.dbox_game.draw_menu and not self.dbox_help.draw_menu:
             self.faces.update()
-            if self.game_state not in (GameState.WON, GameState.LOST):
-                self.board.update()
+            self.board.update()
 
         # Game logic
-        dbox_current_option = self.dbox_game.get_current_option().upper()
+        settings = self.difficulties.get(self.dbox_game.get_current_option())
 
         # Change dificulty
-        if self.dbox_game.pressed and hasattr(GameDifficulty, dbox_current_option):
-            if self.difficulty is not getattr(GameDifficulty, dbox_current_option):
-                self.change_dificulty()
+        if self.dbox_game.pressed and settings is not None:
+            self.dbox_game.pressed = False
+            if self.difficulty != settings:
+                self.change_dificulty(settings)
 
         # New game
         elif (
@@ -174,73 +382,118 @@ class Game:
         elif self.faces.current_state is FacesStates.NEW_GAME:
             self.new_game()
 
-        if self.game_state != GameState.LOST:
-            for square in self.board.squares:
-                # Lost check
-                if square.state.name == "REVEAL" and square.square_type == "x":
-                    self.faces.change_state(FacesStates.LOST)
-                    self.game_state = GameState.LOST
-                    self.wtimer.end()
-                    break
-
-        # Won check
-        if self.game_state != GameState.WON:
-            revealed_squares = 0
-            flaged_squares = 0
-            for square in self.board.squares:
-                if square.state.name == "REVEAL":
-                    revealed_squares += 1
-                elif square.state.name == "FLAG":
-                    flaged_squares += 1
-
-            if flaged_squares == self.board.mines_count:
-                print("All flaged")
-            if revealed_squares + flaged_squares == len(self.board.squares):
-                print("You won")
-                self.faces.change_state(FacesStates.WON)
-                self.game_state = GameState.WON
-                self.wtimer.end()
-
-    def draw(self, screen):
+        # Help
+        if self.dbox_help.pressed:
+            self.dbox_help.pressed = not self.dbox_help.pressed
+            action = self.help_actions.get(self.dbox_help.get_current_option())
+            if action is not None:
+                action()
+
+        # Highlighting the next safe square
+        move = self.solver.next_move() if self.show_hint else None
+        self.board.set_hint(move[0] if move else None)
+
+    def draw(self, screen) -> list[pygame.Rect]:
+        """
+        Redraws only what changed since the last frame,
+        returns a list[pygame.Rect] of the updated areas for pygame.display.update"""
+
         screen = self.display_manager.screen
+
+        # Closing a menu uncovers the layout and the board, everything is redrawn
+        menus = (self.dbox_game.draw_menu, self.dbox_help.draw_menu)
+        force = self.redraw or any(
+            drawn and not menu for drawn, menu in zip(self.drawn_menus, menus)
+        )
+        self.drawn_menus = menus
+        self.redraw = False
+
+        if force:
+            screen.blit(self.layout, (0, 0))
+
+        rects = []
+        rects += self.mine_counter.draw(screen, force)
+        rects += self.wtimer.draw(screen, force)
+        rects += self.faces.draw(screen, force)
+        board_rects = self.board.draw(screen, force)
+        rects += board_rects
+        rects += self.dbox_game.draw(screen, force or bool(board_rects))
+        rects += self.dbox_help.draw(screen, force or bool(board_rects))
+        if self.overlay is not None and not any(menus):
+            rects += self.overlay.draw(screen, self.board.view.topleft)
+
+        return [screen.get_rect()] if force else rects
+
+    def get_layout(self, size: tuple[int, int]) -> pygame.Surface:
+        """Returns the UI layout pre-rendered once for the window size"""
+
+        if size not in self.layouts:
+            layout = self.display_manager.background.copy()
+            self.draw_layout(layout)
+            self.layouts[size] = layout
+        return self.layouts[size]
+
+    def scaled(self, value: float) -> int:
+        return round(value * self.scale)
+
+    def draw_layout(self, screen):
         width, height = screen.get_size()
+        s = self.scaled
 
         # Dropbox background
-        pygame.draw.rect(screen, Colors.white, (0, 0, width, 18))
-        pygame.draw.line(screen, Colors.lighter_gray, (0, 18), (width, 18), 2)
+        pygame.draw.rect(screen, Colors.white, (0, 0, width, s(18)))
+        pygame.draw.line(screen, Colors.lighter_gray, (0, s(18)), (width, s(18)), s(2))
 
         # Layout for UI
-        pygame.draw.rect(screen, Colors.white, (0, 20, width + 5, height), 3)
-        pygame.draw.rect(screen, Colors.light_gray, (3, 23, width - 3, 50), 6)
-        pygame.draw.rect(screen, Colors.light_gray, (9, 29, width - 12, 39))
+        pygame.draw.rect(screen, Colors.white, (0, s(20), width + s(5), height), s(3))
+        pygame.draw.rect(
+            screen, Colors.light_gray, (s(3), s(23), width - s(3), s(50)), s(6)
+        )
+        pygame.draw.rect(screen, Colors.light_gray, (s(9), s(29), width - s(12), s(39)))
 
         # Top
-        pygame.draw.line(screen, Colors.dark_gray, (9, 29), (width - 7, 29), 2)
+        pygame.draw.line(
+            screen, Colors.dark_gray, (s(9), s(29)), (width - s(7), s(29)), s(2)
+        )
         # Left
-        pygame.draw.line(screen, Colors.dark_gray, (9, 29), (9, 65), 2)
+        pygame.draw.line(screen, Colors.dark_gray, (s(9), s(29)), (s(9), s(65)), s(2))
         # Bottom
-        pygame.draw.line(screen, Colors.white, (9, 65), (width - 7, 65), 2)
+        pygame.draw.line(
+            screen, Colors.white, (s(9), s(65)), (width - s(7), s(65)), s(2)
+        )
         # Right
-        pygame.draw.line(screen, Colors.white, (width - 7, 29), (width - 7, 65), 2)
+        pygame.draw.line(
+            screen, Colors.white, (width - s(7), s(29)), (width - s(7), s(65)), s(2)
+        )
 
         # Layout for game board encasing
-        pygame.draw.rect(screen, Colors.light_gray, (3, 67, width - 3, height - 67), 6)
+        pygame.draw.rect(
+            screen,
+            Colors.light_gray,
+            (s(3), s(67), width - s(3), height - s(67)),
+            s(6),
+        )
         # Top
-        pygame.draw.line(screen, Colors.dark_gray, (9, 74), (width - 7, 74), 3)
+        pygame.draw.line(
+            screen, Colors.dark_gray, (s(9), s(74)), (width - s(7), s(74)), s(3)
+        )
         # Left
-        pygame.draw.line(screen, Colors.dark_gray, (10, 74), (10, height - 7), 3)
+        pygame.draw.line(
+            screen, Colors.dark_gray, (s(10), s(74)), (s(10), height - s(7)), s(3)
+        )
         # Bottom
         pygame.draw.line(
-            screen, Colors.white, (9, height - 8), (width - 7, height - 8), 3
+            screen,
+            Colors.white,
+            (s(9), height - s(8)),
+            (width - s(7), height - s(8)),
+            s(3),
         )
         # Right
         pygame.draw.line(
-            screen, Colors.white, (width - 7, 73), (width - 7, height - 7), 3
+            screen,
+            Colors.white,
+            (width - s(7), s(73)),
+            (width - s(7), height - s(7)),
+            s(3),
         )
-
-        self.mine_counter.draw(screen)
-        self.wtimer.draw(screen)
-        self.faces.draw(screen)
-        self.board.draw(screen)
-        self.dbox_game.draw(screen)
-        self.dbox_help.draw(screen)
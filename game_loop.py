@@ -0,0 +1,80 @@
+import time
+
+import pygame
+
+from game import Game
+from display_manager import DisplayManager
+
+
+class GameLoop:
+    """
+    Runs the game at a capped frame rate,
+    fps - rendering rate, frames per second,
+    update_rate - fixed game updates per second, independent of fps,
+    idle_timeout - milliseconds to block waiting for an event while idle,
+    max_updates - game updates allowed per frame when catching up"""
+
+    def __init__(
+        self,
+        game: Game,
+        display_manager: DisplayManager,
+        fps: int = 60,
+        update_rate: int = 60,
+        idle_timeout: int = 1000,
+        max_updates: int = 5,
+    ):
+        self.game = game
+        self.display_manager = display_manager
+        self.fps = fps
+        self.update_rate = update_rate
+        self.idle_timeout = idle_timeout
+        self.max_updates = max_updates
+        self.clock = pygame.time.Clock()
+        self.running = False
+        self.first_frame = None
+
+    def get_events(self) -> tuple[list[pygame.event.Event], bool]:
+        """Returns the pending events and whether it blocked waiting for them"""
+
+        # Sleeping until something happens when nothing is animated
+        if self.game.is_idle():
+            event = pygame.event.wait(self.idle_timeout)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            return events + pygame.event.get(), True
+        return pygame.event.get(), False
+
+    def run(self):
+        step = 1000 / self.update_rate
+        accumulator = step
+        profiler = self.game.profiler
+        self.running = True
+
+        while self.running:
+            events, waited = self.get_events()
+            with profiler.phase("events"):
+                for event in events:
+                    self.game.dispatch_events(event)
+                    if event.type == pygame.QUIT:
+                        self.running = False
+
+            # Fixed timestep updates, the time spent waiting idle is not caught up,
+            # a frame after a wait runs a single update
+            elapsed = self.clock.tick(self.fps)
+            if waited:
+                accumulator = step
+            else:
+                accumulator = min(accumulator + elapsed, step * self.max_updates)
+            with profiler.phase("update"):
+                while accumulator >= step:
+                    self.game.update()
+                    accumulator -= step
+
+            with profiler.phase("draw"):
+                rects = self.game.draw(self.display_manager.screen)
+            with profiler.phase("display"):
+                pygame.display.update(rects)
+            profiler.end_frame()
+            if self.first_frame is None:
+                self.first_frame = time.perf_counter()
+
+        profiler.close()
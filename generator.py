@@ -0,0 +1,134 @@
+from array import array
+from dataclasses import dataclass
+from itertools import compress
+from random import Random
+from typing import Iterable
+
+# Byte translation tables, byte values below the threshold become a mine
+_THRESHOLDS = [
+    bytes(int(n < threshold) for n in range(256)) for threshold in range(257)
+]
+
+
+def place_mines(
+    rows: int,
+    columns: int,
+    mines_count: int,
+    rng: Random,
+    exclude: Iterable[int] = (),
+) -> bytearray:
+    """
+    Picks mine locations without replacement,
+    rows, columns - board dimensions,
+    mines_count - a number of mines to place,
+    rng - random.Random instance, seed it for reproducible boards,
+    exclude - flat indices (row * columns + column) which never get a mine,
+    returns a flat mine mask, one byte per square (0 or 1)"""
+
+    size = rows * columns
+    excluded = sorted(set(exclude))
+    free = size - len(excluded)
+    if not 0 <= mines_count <= free:
+        raise ValueError(f"Cannot place {mines_count} mines on {free} free squares")
+
+    if free // 16 <= mines_count <= free - free // 16 and free >= 256:
+        return _place_mines_dense(size, mines_count, rng, excluded)
+
+    mines = sorted(rng.sample(range(free), mines_count))
+
+    # Mapping indices of the free squares back onto the board
+    if excluded:
+        skipped = 0
+        for n, index in enumerate(mines):
+            while skipped < len(excluded) and excluded[skipped] <= index + skipped:
+                skipped += 1
+            mines[n] = index + skipped
+
+    mask = bytearray(size)
+    for index in mines:
+        mask[index] = 1
+    return mask
+
+
+def _place_mines_dense(
+    size: int, mines_count: int, rng: Random, excluded: list[int]
+) -> bytearray:
+    """
+    Mine placement for dense boards, every square gets a mine with the board
+    density from one random byte, then random squares are added or removed until
+    the count matches, no square is favored so every layout stays equally likely"""
+
+    free = size - len(excluded)
+    excluded = set(excluded)
+    threshold = round(256 * mines_count / free)
+    mask = bytearray(rng.randbytes(size).translate(_THRESHOLDS[threshold]))
+    for index in excluded:
+        mask[index] = 0
+
+    # Correcting the count, density is between 1/16 and 15/16 so hits are frequent
+    surplus = mask.count(1) - mines_count
+    target = 1 if surplus > 0 else 0
+    while surplus:
+        index = rng.randrange(size)
+        if mask[index] == target and (target or index not in excluded):
+            mask[index] = 1 - target
+            surplus += -1 if target else 1
+
+    return mask
+
+
+def mine_indices(mines: bytearray) -> array:
+    """Returns an array of flat indices of the mines in a mine mask, 4 bytes per mine"""
+
+    return array("I", compress(range(len(mines)), mines))
+
+
+def count_neighbors(mines: bytearray, rows: int, columns: int) -> bytearray:
+    """
+    Counts neighboring mines of every square at once,
+    mines - flat mine mask, one byte per square (0 or 1),
+    returns a bytearray with the number of neighboring mines per square
+
+    The mask is read into a single integer, one byte per square, with an empty
+    byte closing every row, so shifting by a byte moves the whole board one
+    column and shifting by a row moves it one row, the padding keeps the board
+    edges from wrapping around, counts never exceed 8 so bytes never carry."""
+
+    stride = columns + 1
+    padded = b"\x00".join(
+        mines[row * columns : (row + 1) * columns] for row in range(rows)
+    )
+    length = rows * stride
+    grid = int.from_bytes(padded, "little")
+
+    # Sum of the square and its left and right neighbors
+    horizontal = grid + (grid << 8) + (grid >> 8)
+    # Adding the rows above and below, the square itself is not its neighbor
+    total = horizontal + (horizontal << 8 * stride) + (horizontal >> 8 * stride)
+    total = (total - grid) & ((1 << 8 * length) - 1)
+
+    counts = bytearray(total.to_bytes(length, "little"))
+    del counts[columns::stride]
+    return counts
+
+
+@dataclass
+class Layout:
+    """
+    Mines of a whole game generated ahead of time,
+    rng - the generator after placing the mines, kept for the first click replacement"""
+
+    seed: int
+    rng: Random
+    mines: bytearray
+    counts: bytearray
+
+
+def generate_layout(
+    rows: int, columns: int, mines_count: int, seed: int, exclude: Iterable[int] = ()
+) -> Layout:
+    """Places the mines and counts their neighbors the same way Engine.new_game does"""
+
+    rng = Random(seed)
+    mines = place_mines(rows, columns, mines_count, rng, exclude)
+    return Layout(seed, rng, mines, count_neighbors(mines, rows, columns))
@@ -1,30 +1,92 @@
+import argparse
+import time
+
+started = time.perf_counter()
+
 import pygame
 
+from atlas import Atlas
+from constants import BoardSettings
 from game import Game, GameImages
+from game_loop import GameLoop
+from profiler import Profiler
+from replay import Replay
 from display_manager import DisplayManager
 
-pygame.init()
 
-display_manager = DisplayManager()
+def main():
+    parser = argparse.ArgumentParser(description="Minesweeper")
+    parser.add_argument(
+        "--custom",
+        type=BoardSettings.parse,
+        action="append",
+        default=[],
+        metavar="ROWSxCOLUMNSxMINES",
+        help="adds a custom difficulty to the Game menu",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1, help="size of the whole window, 2 for HiDPI"
+    )
+    parser.add_argument("--record", metavar="DIR", help="saves a replay of every game")
+    parser.add_argument("--replay", metavar="FILE", help="plays a recorded game")
+    parser.add_argument(
+        "--snapshot",
+        default="snapshot.mss",
+        metavar="FILE",
+        help="file of the Save and Load options of the Help menu",
+    )
+    parser.add_argument("--load", action="store_true", help="continues the saved game")
+    parser.add_argument(
+        "--profile", action="store_true", help="shows frame times, F3 hides them"
+    )
+    parser.add_argument(
+        "--trace", metavar="FILE", help="writes a Chrome trace of the frames on exit"
+    )
+    parser.add_argument(
+        "--startup-time", action="store_true", help="prints the time to the first frame"
+    )
+    args = parser.parse_args()
+
+    # A replay which cannot be played is reported before any window opens
+    replay = None
+    if args.replay:
+        try:
+            replay = Replay.load(args.replay)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot load the replay {args.replay}: {error}")
+
+    pygame.init()
 
-# Sprites
-spritesheet_tiles = pygame.image.load("assets/images/tiles.png").convert_alpha()
-spritesheet_faces = pygame.image.load("assets/images/faces.png").convert_alpha()
-spritesheet_digits = pygame.image.load("assets/images/digits.png").convert_alpha()
+    # Sprites, the atlas is converted once the display mode is set
+    atlas = Atlas.load()
+    display_manager = DisplayManager(atlas["logo"])
+    atlas.convert()
 
-game_imgs = GameImages(spritesheet_tiles, spritesheet_faces, spritesheet_digits)
-game = Game(display_manager, game_imgs)
+    game_imgs = GameImages.from_atlas(atlas)
+    profiler = Profiler(args.profile or args.trace is not None, trace_path=args.trace)
+    game = Game(
+        display_manager,
+        game_imgs,
+        args.custom,
+        args.scale,
+        args.record,
+        args.snapshot,
+        profiler,
+        show_overlay=args.profile,
+    )
+    if replay is not None:
+        game.play_replay(replay)
+    elif args.load:
+        game.load_snapshot()
 
+    game_loop = GameLoop(game, display_manager, fps=60, update_rate=60)
+    game_loop.run()
+    game.board_factory.close()
 
-running = True
-while running:
-    for event in pygame.event.get():
-        game.dispatch_events(event)
-        if event.type == pygame.QUIT:
-            running = False
+    if args.startup_time:
+        print(f"First frame after {(game_loop.first_frame - started) * 1000:.0f} ms")
 
-    display_manager.draw()
-    game.update()
 
-    game.draw(display_manager.screen)
-    pygame.display.flip()
+# Board layouts are generated in a spawned process, which imports this module
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+from dataclasses import dataclass
+from itertools import compress
+from random import Random
+from typing import Union
+
+import generator
+from engine import REVEAL, REVEALED, Engine
+from solver import Solver
+from square import SquareEvent
+
+
+@dataclass
+class Checkpoint:
+    """
+    State of a play before a step, the sets growing with the revealed squares
+    are not copied, they are rebuilt from the states on restore,
+    safe - squares proven safe but not revealed yet"""
+
+    states: bytearray
+    revealed_count: int
+    changed: set[int]
+    safe: set[int]
+    mines: set[int]
+    constraints: dict[frozenset, int]
+
+
+class LogicPlayer:
+    """
+    Plays an engine board from the start square revealing only squares proven
+    safe by the solver rules, constraints are kept between the steps and only
+    the newly revealed numbers are added, they are collected from the REVEALED events,
+    a checkpoint is taken before every step so after a mine is moved the play
+    resumes from the last step the move did not affect"""
+
+    def __init__(self, engine: Engine, start: int):
+        self.engine = engine
+        self.start = start
+        self.neighbors = [engine.get_neighbors(index) for index in range(engine.size)]
+        self.checkpoints = []
+        self.revealed_at = {}
+        self.changed = set()
+        engine.subscribe(SquareEvent.REVEALED, self.changed.update)
+
+    def resume_step(self, moved: int) -> Union[int, None]:
+        """
+        Returns the last checkpoint taken before a neighbor of the moved mine
+        was revealed, None when the play has to start over"""
+
+        states = self.engine.states
+        steps = [
+            self.revealed_at[n] for n in self.neighbors[moved] if states[n] == REVEAL
+        ]
+        step = min(steps, default=len(self.checkpoints)) - 1
+        return step if step >= 0 else None
+
+    def restore(self, step: int) -> tuple[Solver, dict[frozenset, int], set[int]]:
+        engine = self.engine
+        checkpoint = self.checkpoints[step]
+        del self.checkpoints[step:]
+
+        engine.states = bytearray(checkpoint.states)
+        engine.revealed_count = checkpoint.revealed_count
+        self.changed.clear()
+        self.changed.update(checkpoint.changed)
+        engine.flagged_count = 0
+        engine.mine_hit = False
+
+        # Squares revealed before the step, the changed ones are still to be handled
+        revealed = set(compress(range(engine.size), engine.states.translate(REVEALED)))
+        revealed -= checkpoint.changed
+
+        solver = Solver(engine)
+        solver.safe = revealed | checkpoint.safe
+        solver.mines = set(checkpoint.mines)
+        return solver, dict(checkpoint.constraints), revealed
+
+    def play(self, resume: Union[int, None] = None) -> set[int]:
+        """
+        resume - checkpoint to continue from, the play starts over by default,
+        returns the undecided frontier squares, the board is solved once engine.won"""
+
+        engine = self.engine
+        neighbors = self.neighbors
+        if resume is not None:
+            solver, constraints, revealed_squares = self.restore(resume)
+        else:
+            self.checkpoints = []
+            self.changed.clear()
+            engine.clear()
+            engine.untouched = False
+            engine.reveal(self.start)
+            solver, constraints, revealed_squares = Solver(engine), {}, set()
+
+        while not engine.won:
+            self.checkpoints.append(
+                Checkpoint(
+                    bytearray(engine.states),
+                    engine.revealed_count,
+                    set(self.changed),
+                    solver.safe - revealed_squares,
+                    set(solver.mines),
+                    dict(constraints),
+                )
+            )
+            step = len(self.checkpoints) - 1
+
+            revealed = set(self.changed)
+            self.changed.clear()
+            revealed_squares |= revealed
+            solver.safe |= revealed
+
+            states, counts = engine.states, engine.counts
+            for index in revealed:
+                self.revealed_at[index] = step
+                if counts[index] and not engine.mines[index]:
+                    cells = frozenset(
+                        n for n in neighbors[index] if states[n] != REVEAL
+                    )
+                    if cells:
+                        constraints[cells] = counts[index]
+            constraints = solver.propagate(constraints)
+
+            moves = solver.safe - revealed_squares
+
+            # Mine count rule, once every mine is known the rest is safe
+            if not moves and len(solver.mines) == engine.mines_count:
+                moves = [
+                    i
+                    for i in range(engine.size)
+                    if states[i] != REVEAL and i not in solver.mines
+                ]
+            if not moves:
+                return {cell for cells in constraints for cell in cells}
+
+            engine.reveal_many(moves)
+
+        return set()
+
+
+def repair(
+    engine: Engine,
+    stuck: set[int],
+    rng: Random,
+    exclude: list[int],
+    neighbors: list[list[int]],
+    tries: int = 32,
+) -> Union[int, None]:
+    """
+    Moves a mine from an undecided frontier square, or from next to one, to a
+    square away from the revealed ones, random squares are tried first before
+    every such square is listed,
+    neighbors - neighbors of every square, as listed by LogicPlayer,
+    returns the square the mine was moved from, None when there is no such move"""
+
+    mines = [i for i in stuck if engine.mines[i]]
+    if not mines:
+        mines = list(
+            {
+                n
+                for i in stuck
+                for n in neighbors[i]
+                if engine.mines[n] and engine.states[n] != REVEAL
+            }
+        )
+    if not mines:
+        return None
+
+    states = engine.states
+
+    def is_interior(index: int) -> bool:
+        return (
+            states[index] != REVEAL
+            and not engine.mines[index]
+            and index not in exclude
+            and index not in stuck
+            and all(states[n] != REVEAL for n in neighbors[index])
+        )
+
+    for _ in range(tries):
+        target = rng.randrange(engine.size)
+        if is_interior(target):
+            break
+    else:
+        interior = [i for i in range(engine.size) if is_interior(i)]
+        if not interior:
+            return None
+        target = rng.choice(interior)
+
+    source = rng.choice(mines)
+    layout = bytearray(engine.mines)
+    layout[source] = 0
+    layout[target] = 1
+    engine.set_mines(layout)
+    return source
+
+
+def generate(
+    engine: Engine, start: int, max_repairs: int = 50, max_layouts: int = 20
+) -> bytearray:
+    """
+    Layout generator for Engine, returns a mine mask solvable from the start
+    square without guessing, random layouts are repaired by moving mines away
+    from the squares the solver got stuck on instead of being regenerated,
+    a new layout is drawn only when the repairs run out,
+    the last layout is returned if none gets solvable"""
+
+    rng = engine.rng
+    exclude = engine.get_safe_zone(start)
+
+    def draw() -> generator.Layout:
+        return generator.generate_layout(
+            engine.rows,
+            engine.columns,
+            engine.mines_count,
+            rng.getrandbits(32),
+            exclude,
+        )
+
+    # The scratch board starts from the first layout, none is placed for nothing
+    scratch = Engine(engine.rows, engine.columns, engine.mines_count, layout=draw())
+    player = LogicPlayer(scratch, start)
+
+    for attempt in range(max_layouts):
+        if attempt:
+            scratch.new_game(layout=draw())
+        stuck = player.play()
+        for _ in range(max_repairs):
+            if scratch.won:
+                break
+            moved = repair(scratch, stuck, rng, exclude, player.neighbors)
+            if moved is None:
+                break
+            stuck = player.play(player.resume_step(moved))
+        if scratch.won:
+            break
+
+    return scratch.mines
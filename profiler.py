@@ -0,0 +1,186 @@
+"""
+Frame time instrumentation, the phases of every frame are timed into rolling
+windows of per frame totals, shown by an overlay and optionally written as a
+Chrome trace (chrome://tracing or ui.perfetto.dev), a disabled profiler hands
+out one shared empty context so timing costs nothing but the call"""
+
+import json
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from typing import Union
+
+import pygame
+
+from constants import Colors
+
+NULL_PHASE = nullcontext()
+
+# Profiler names counting things instead of nanoseconds
+COUNTERS = {"tiles"}
+
+
+class Phase:
+    """Times one phase, shared by every use of the name so phases must not nest in themselves"""
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+
+    def __exit__(self, *_):
+        self.profiler.add(self.name, self.started, time.perf_counter_ns())
+
+
+class Profiler:
+    """
+    Times named phases of the frames,
+    enabled - False makes phase return a shared empty context and count return at once,
+    window - frames kept for the percentiles,
+    trace_path - a Chrome trace of every phase is written there on close,
+    max_events - trace events kept, the oldest are dropped first"""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        window: int = 600,
+        trace_path: Union[str, None] = None,
+        max_events: int = 1_000_000,
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.trace_path = trace_path
+        self.phases = {}
+        self.frame = defaultdict(int)
+        self.history = defaultdict(lambda: deque(maxlen=window))
+        self.frame_times = deque(maxlen=window)
+        self.frame_started = time.perf_counter_ns()
+        self.events = deque(maxlen=max_events) if trace_path else None
+        self.origin = time.perf_counter_ns()
+
+    def phase(self, name: str):
+        """Returns a context manager timing the phase, its time adds up within a frame"""
+
+        if not self.enabled:
+            return NULL_PHASE
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+        return phase
+
+    def add(self, name: str, started: int, ended: int):
+        self.frame[name] += ended - started
+        if self.events is not None:
+            self.events.append((name, started, ended))
+
+    def count(self, name: str, value: int):
+        """Adds to a per frame counter, like the number of tiles drawn"""
+
+        if self.enabled:
+            self.frame[name] += value
+
+    def end_frame(self):
+        """Moves the totals of the frame into the rolling windows"""
+
+        if not self.enabled:
+            return
+
+        now = time.perf_counter_ns()
+        self.frame_times.append(now - self.frame_started)
+        self.frame_started = now
+        for name in self.history.keys() | self.frame.keys():
+            self.history[name].append(self.frame.get(name, 0))
+        self.frame.clear()
+
+    def percentile(self, name: str, percent: float) -> float:
+        values = sorted(self.history[name])
+        if not values:
+            return 0
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+    @property
+    def fps(self) -> float:
+        total = sum(self.frame_times)
+        return len(self.frame_times) * 1e9 / total if total else 0
+
+    def get_summary(self) -> dict[str, dict[str, float]]:
+        """Returns {phase: {"p50": ms, "p99": ms}}, counters are kept as they are"""
+
+        return {
+            name: {
+                percent: self.percentile(name, value) / (1 if name in COUNTERS else 1e6)
+                for percent, value in (("p50", 50), ("p99", 99))
+            }
+            for name in sorted(self.history)
+        }
+
+    def write_trace(self, path: str):
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (started - self.origin) / 1000,
+                "dur": (ended - started) / 1000,
+                "pid": 0,
+                "tid": 0,
+            }
+            for name, started, ended in self.events
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def close(self):
+        if self.trace_path is not None and self.events is not None:
+            self.write_trace(self.trace_path)
+
+
+class Overlay:
+    """
+    Text box with the frame rate and the percentiles of every phase,
+    its text is refreshed every interval milliseconds so reading it stays legible"""
+
+    def __init__(self, profiler: Profiler, scale: float = 1, interval: int = 500):
+        self.profiler = profiler
+        self.font = pygame.font.SysFont("Consolas", round(11 * scale))
+        self.interval = interval
+        self.visible = True
+        self.refreshed_at = None
+        self.surface = None
+        self.size = (0, 0)
+
+    def render(self) -> pygame.Surface:
+        profiler = self.profiler
+        lines = [f"{profiler.fps:5.1f} fps"]
+        for name, values in profiler.get_summary().items():
+            unit = "" if name in COUNTERS else " ms"
+            digits = 0 if name in COUNTERS else 2
+            lines.append(
+                f"{name:<10} p50 {values['p50']:6.{digits}f}{unit}"
+                f" p99 {values['p99']:6.{digits}f}{unit}"
+            )
+
+        line_height = self.font.get_linesize()
+        images = [self.font.render(line, True, Colors.white) for line in lines]
+        # The box never shrinks, a smaller one would leave the old one around it
+        width, height = self.size = (
+            max(self.size[0], max(image.get_width() for image in images) + 8),
+            max(self.size[1], line_height * len(images) + 8),
+        )
+        surface = pygame.Surface((width, height))
+        surface.fill(Colors.text_color)
+        for n, image in enumerate(images):
+            surface.blit(image, (4, 4 + n * line_height))
+        return surface
+
+    def draw(self, screen, position: tuple[int, int]) -> list[pygame.Rect]:
+        if not self.visible:
+            return []
+
+        now = pygame.time.get_ticks()
+        if self.refreshed_at is None or now - self.refreshed_at >= self.interval:
+            self.refreshed_at = now
+            self.surface = self.render()
+        return [screen.blit(self.surface, position)]
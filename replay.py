@@ -0,0 +1,300 @@
+"""
+Records games into compact replays and plays them back,
+a replay is a fixed header with the board settings and seed followed by the
+moves, a move is two varints, the change of the square index since the
+previous move (zigzag encoded) with the move kind in its two low bits, and the
+centiseconds since the previous move, the game result closes the replay,
+python replay.py verify replays/*.msr"""
+
+import argparse
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import BinaryIO, Union
+
+import no_guess
+from constants import BoardSettings
+from engine import Engine
+
+MAGIC = b"MSRP"
+VERSION = 1
+
+# magic, version, flags, rows, columns, mines count, seed
+HEADER = struct.Struct("<4sBBHHII")
+SAFE_FIRST_CLICK = 1
+NO_GUESS = 2
+
+
+class Move(IntEnum):
+    REVEAL = 0
+    FLAG = 1
+    CHORD = 2
+    END = 3
+
+
+MOVES = tuple(Move)
+
+
+class Outcome(IntEnum):
+    UNFINISHED = 0
+    WON = 1
+    LOST = 2
+
+
+def get_outcome(engine: Engine) -> Outcome:
+    if engine.won:
+        return Outcome.WON
+    if engine.lost:
+        return Outcome.LOST
+    return Outcome.UNFINISHED
+
+
+def get_actions(engine: Engine) -> tuple:
+    """Engine methods applying the moves, indexed by Move"""
+
+    return engine.reveal, engine.flag, engine.chord
+
+
+def apply_move(engine: Engine, move: Move, index: int):
+    get_actions(engine)[move](index)
+
+
+def encode_varint(value: int, output: bytearray):
+    while value > 0x7F:
+        output.append(value & 0x7F | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def decode_varints(data: bytes) -> list[int]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+@dataclass
+class Replay:
+    """
+    A recorded game,
+    moves - (Move, square index, centiseconds since the first move),
+    outcome and revealed_count are None when the recording was interrupted"""
+
+    settings: BoardSettings
+    seed: int
+    safe_first_click: bool = True
+    no_guess: bool = False
+    moves: list[tuple[Move, int, int]] = field(default_factory=list)
+    outcome: Union[Outcome, None] = None
+    revealed_count: Union[int, None] = None
+
+    def create_engine(self) -> Engine:
+        return Engine(
+            self.settings.rows,
+            self.settings.columns,
+            self.settings.mines_count,
+            seed=self.seed,
+            safe_first_click=self.safe_first_click,
+            layout_generator=no_guess.generate if self.no_guess else None,
+        )
+
+    def verify(self) -> bool:
+        """Plays the moves headlessly, True when the game ends as recorded"""
+
+        engine = self.create_engine()
+        actions = get_actions(engine)
+        for move, index, _ in self.moves:
+            actions[move](index)
+        if self.outcome is None:
+            return True
+        return (
+            get_outcome(engine) == self.outcome
+            and engine.revealed_count == self.revealed_count
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        """Raises ValueError when the data is not a complete replay of this version"""
+
+        if len(data) < HEADER.size:
+            raise ValueError("not a replay")
+        magic, version, flags, rows, columns, mines_count, seed = HEADER.unpack_from(
+            data
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a replay of this version")
+        size = rows * columns
+        if not size or mines_count > size:
+            raise ValueError("not a playable board")
+
+        replay = cls(
+            BoardSettings(rows, columns, mines_count),
+            seed,
+            bool(flags & SAFE_FIRST_CLICK),
+            bool(flags & NO_GUESS),
+        )
+        values = decode_varints(data[HEADER.size :])
+        moves = replay.moves
+        index = elapsed = 0
+        for n in range(0, len(values) - 1, 2):
+            token = values[n]
+            move = MOVES[token & 3]
+            if move is Move.END:
+                replay.outcome = Outcome(token >> 2)
+                replay.revealed_count = values[n + 1]
+                break
+
+            step = token >> 2
+            index += -(step >> 1) - 1 if step & 1 else step >> 1
+            if not 0 <= index < size:
+                raise ValueError(f"a move on square {index} is outside the board")
+            elapsed += values[n + 1]
+            moves.append((move, index, elapsed))
+        return replay
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """Raises OSError for an unreadable file, ValueError when it is not a replay"""
+
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+class ReplayWriter:
+    """
+    Writes the replay of a game while it is played, the file is created on the
+    first move and every move is flushed, so an interrupted game still leaves
+    a readable replay, games without moves leave no file"""
+
+    def __init__(self, path: str, engine: Engine, no_guess: bool = False):
+        self.path = path
+        self.engine = engine
+        self.no_guess = no_guess
+        self.file: Union[BinaryIO, None] = None
+        self.index = 0
+        self.time = None
+
+    def write_header(self):
+        engine = self.engine
+        flags = SAFE_FIRST_CLICK * engine.safe_first_click | NO_GUESS * self.no_guess
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.file = open(self.path, "wb")
+        self.file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                flags,
+                engine.rows,
+                engine.columns,
+                engine.mines_count,
+                engine.seed,
+            )
+        )
+
+    def write(self, move: Move, index: int):
+        now = time.monotonic()
+        if self.file is None:
+            self.write_header()
+            self.time = now
+
+        step = index - self.index
+        delay = round((now - self.time) * 100)
+        output = bytearray()
+        encode_varint((step << 1 if step >= 0 else -step * 2 - 1) << 2 | move, output)
+        encode_varint(delay, output)
+        self.file.write(output)
+        self.file.flush()
+
+        # Following the rounded time, so rounding errors do not add up
+        self.index = index
+        self.time += delay / 100
+
+    def close(self):
+        """Writes the game result and closes the file"""
+
+        if self.file is None:
+            return
+
+        output = bytearray()
+        encode_varint(get_outcome(self.engine) << 2 | Move.END, output)
+        encode_varint(self.engine.revealed_count, output)
+        self.file.write(output)
+        self.file.close()
+        self.file = None
+
+
+class ReplayPlayer:
+    """Hands out the moves of a replay once their time has come, at real speed"""
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.next = 0
+        self.started = time.monotonic()
+
+    @property
+    def done(self) -> bool:
+        return self.next >= len(self.replay.moves)
+
+    def get_due(self) -> list[tuple[Move, int]]:
+        elapsed = (time.monotonic() - self.started) * 100
+        moves = self.replay.moves
+        due = []
+        while self.next < len(moves) and moves[self.next][2] <= elapsed:
+            move, index, _ = moves[self.next]
+            due.append((move, index))
+            self.next += 1
+        return due
+
+
+def verify_file(path: str) -> Union[str, None]:
+    """Returns why the replay fails, None when it ends as recorded"""
+
+    try:
+        replay = Replay.load(path)
+    except (OSError, ValueError) as error:
+        return f"cannot be read, {error}"
+    return None if replay.verify() else "does not end as recorded"
+
+
+def verify(paths: list[str], workers: int) -> bool:
+    started = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        chunk = max(1, len(paths) // (workers * 4))
+        results = pool.map(verify_file, paths, chunksize=chunk)
+        failed = [
+            (path, reason) for path, reason in zip(paths, results) if reason is not None
+        ]
+    elapsed = time.perf_counter() - started
+
+    for path, reason in failed:
+        print(f"{path}: {reason}")
+    print(
+        f"{len(paths) - len(failed)}/{len(paths)} replays verified"
+        f", {len(paths) / elapsed:.0f} replays/s"
+    )
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    verify_parser = subparsers.add_parser("verify", help="replays games headlessly")
+    verify_parser.add_argument("paths", nargs="+")
+    verify_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        raise SystemExit(0 if verify(args.paths, args.workers) else 1)
+
+
+if __name__ == "__main__":
+    main()
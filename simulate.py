@@ -0,0 +1,177 @@
+"""
+Plays batches of games headlessly on every core and prints aggregated stats,
+python simulate.py --games 10000 --custom 30x30x150"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from random import Random
+
+from constants import BoardSettings, GameDifficulty
+from engine import Engine
+from no_guess import generate
+from solver import Solver
+from square import SquareState
+
+
+@dataclass
+class Stats:
+    games: int = 0
+    wins: int = 0
+    reveals: int = 0
+
+    def __add__(self, other):
+        return Stats(
+            self.games + other.games,
+            self.wins + other.wins,
+            self.reveals + other.reveals,
+        )
+
+
+def play_random(engine: Engine, rng: Random) -> int:
+    """Reveals hidden squares in random order until the game ends"""
+
+    order = list(range(engine.size))
+    rng.shuffle(order)
+
+    reveals = 0
+    for index in order:
+        if engine.states[index] == SquareState.HIDE:
+            engine.reveal(index)
+            reveals += 1
+            if engine.lost or engine.won:
+                break
+    return reveals
+
+
+def play_solver(engine: Engine, rng: Random) -> int:
+    """Reveals every certainly safe square, guesses the least risky one otherwise"""
+
+    solver = Solver(engine)
+    reveals = 0
+    while not (engine.lost or engine.won):
+        moves = solver.safe_moves() or [solver.next_move()[0]]
+        for index in moves:
+            if engine.states[index] == SquareState.HIDE:
+                engine.reveal(index)
+                reveals += 1
+    return reveals
+
+
+STRATEGIES = {"random": play_random, "solver": play_solver}
+
+
+def game_seed(base_seed: int, settings: BoardSettings, number: int) -> int:
+    """Seed of a single game, the same whichever worker plays it"""
+
+    key = f"{base_seed}:{settings.rows}x{settings.columns}x{settings.mines_count}"
+    return Random(f"{key}:{number}").getrandbits(32)
+
+
+def run_games(
+    settings: BoardSettings,
+    start: int,
+    count: int,
+    base_seed: int,
+    strategy: str,
+    no_guess: bool = False,
+) -> Stats:
+    """Worker task, plays games start..start + count and returns only their stats"""
+
+    play = STRATEGIES[strategy]
+    engine = Engine(
+        settings.rows,
+        settings.columns,
+        settings.mines_count,
+        seed=0,
+        layout_generator=generate if no_guess else None,
+    )
+    stats = Stats()
+    for number in range(start, start + count):
+        seed = game_seed(base_seed, settings, number)
+        engine.new_game(seed)
+        stats.reveals += play(engine, Random(seed))
+        stats.wins += engine.won
+        stats.games += 1
+    return stats
+
+
+def simulate(
+    pool: ProcessPoolExecutor,
+    settings: BoardSettings,
+    games: int,
+    base_seed: int,
+    strategy: str,
+    chunk: int,
+    no_guess: bool = False,
+) -> Stats:
+    tasks = [
+        pool.submit(
+            run_games,
+            settings,
+            start,
+            min(chunk, games - start),
+            base_seed,
+            strategy,
+            no_guess,
+        )
+        for start in range(0, games, chunk)
+    ]
+    return sum((task.result() for task in as_completed(tasks)), Stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=1000, help="games per board")
+    parser.add_argument(
+        "--difficulty",
+        nargs="*",
+        choices=[difficulty.name for difficulty in GameDifficulty],
+        default=[difficulty.name for difficulty in GameDifficulty],
+    )
+    parser.add_argument(
+        "--custom",
+        type=BoardSettings.parse,
+        action="append",
+        default=[],
+        metavar="ROWSxCOLUMNSxMINES",
+    )
+    parser.add_argument("--strategy", choices=STRATEGIES, default="random")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, help="games per worker task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-guess", action="store_true", help="boards solvable without guessing"
+    )
+    args = parser.parse_args()
+
+    boards = [(name, GameDifficulty[name].value) for name in args.difficulty]
+    boards += [(str(settings), settings) for settings in args.custom]
+    chunk = args.chunk or max(1, args.games // (args.workers * 4))
+
+    print(f"{'board':<16}{'games':>8}{'win rate':>10}{'reveals':>10}{'games/s':>10}")
+    with ProcessPoolExecutor(args.workers) as pool:
+        for name, settings in boards:
+            started = time.perf_counter()
+            stats = simulate(
+                pool,
+                settings,
+                args.games,
+                args.seed,
+                args.strategy,
+                chunk,
+                args.no_guess,
+            )
+            elapsed = time.perf_counter() - started
+            print(
+                f"{name:<16}{stats.games:>8}"
+                f"{stats.wins / stats.games:>10.2%}"
+                f"{stats.reveals / stats.games:>10.2f}"
+                f"{stats.games / elapsed:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
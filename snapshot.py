@@ -0,0 +1,159 @@
+"""
+Snapshots of a game in progress, a fixed header followed by the square states
+packed 2 bits per square and the mines packed 1 bit per square, both are packed
+and unpacked a whole stride at a time so no per-square Python objects are made"""
+
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from random import Random
+
+from constants import BoardSettings
+from engine import Engine
+
+MAGIC = b"MSSN"
+VERSION = 1
+
+# magic, version, flags, rows, columns, mines count, seed, seconds on the timer
+HEADER = struct.Struct("<4sBBIIIII")
+UNTOUCHED = 1
+SAFE_FIRST_CLICK = 2
+NO_GUESS = 4
+
+# Byte translation tables picking a field out of a packed byte
+_FIELDS = {
+    bits: [
+        bytes(byte >> shift & (1 << bits) - 1 for byte in range(256))
+        for shift in range(0, 8, bits)
+    ]
+    for bits in (1, 2)
+}
+
+
+def pack(values: bytes, bits: int) -> bytes:
+    """
+    Packs values of the given bit width, 8 // bits of them per byte, first in the
+    lowest bits, every field of the bytes is filled by shifting one big integer"""
+
+    per_byte = 8 // bits
+    length = -(-len(values) // per_byte)
+    values = bytes(values) + bytes(length * per_byte - len(values))
+
+    packed = 0
+    for n in range(per_byte):
+        packed |= int.from_bytes(values[n::per_byte], "little") << n * bits
+    return packed.to_bytes(length, "little")
+
+
+def unpack(packed: bytes, bits: int, size: int) -> bytearray:
+    per_byte = 8 // bits
+    values = bytearray(len(packed) * per_byte)
+    for n, table in enumerate(_FIELDS[bits]):
+        values[n::per_byte] = packed.translate(table)
+    del values[size:]
+    return values
+
+
+@dataclass
+class Snapshot:
+    settings: BoardSettings
+    seed: int
+    elapsed: int
+    untouched: bool
+    safe_first_click: bool
+    no_guess: bool
+    mines: bytes
+    states: bytes
+
+    @classmethod
+    def capture(cls, engine: Engine, elapsed: int, no_guess: bool) -> "Snapshot":
+        return cls(
+            BoardSettings(engine.rows, engine.columns, engine.mines_count),
+            engine.seed,
+            elapsed,
+            engine.untouched,
+            engine.safe_first_click,
+            no_guess,
+            engine.mines,
+            engine.states,
+        )
+
+    def restore(self, engine: Engine):
+        """Puts the snapshot into an engine of the same settings"""
+
+        engine.safe_first_click = self.safe_first_click
+        if self.untouched:
+            # The first click may still move the mines, the generator is needed,
+            # flags placed before it are kept
+            engine.new_game(self.seed)
+            engine.set_states(bytearray(self.states))
+            return
+
+        engine.seed, engine.rng = self.seed, Random(self.seed)
+        engine.untouched = False
+        engine.set_mines(bytearray(self.mines))
+        engine.set_states(bytearray(self.states))
+
+    def save(self, path: str):
+        flags = (
+            UNTOUCHED * self.untouched
+            | SAFE_FIRST_CLICK * self.safe_first_click
+            | NO_GUESS * self.no_guess
+        )
+        with open(path, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    flags,
+                    self.settings.rows,
+                    self.settings.columns,
+                    self.settings.mines_count,
+                    self.seed,
+                    self.elapsed,
+                )
+            )
+            file.write(pack(self.states, 2))
+            file.write(pack(self.mines, 1))
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        """
+        Maps the file instead of reading it, only the unpacked buffers are allocated,
+        raises OSError when the file cannot be read and ValueError when it is not
+        a complete snapshot of this version"""
+
+        # A file shorter than the header cannot be mapped or unpacked
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} is not a snapshot")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version, flags, rows, columns, mines_count, seed, elapsed = (
+                    HEADER.unpack_from(data)
+                )
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{path} is not a snapshot of this version")
+
+                size = rows * columns
+                if not size or mines_count > size:
+                    raise ValueError(f"{path} is not a playable board")
+                states_end = HEADER.size + -(-size // 4)
+                mines_end = states_end + -(-size // 8)
+                if len(data) != mines_end:
+                    raise ValueError(f"{path} is truncated")
+
+                mines = unpack(data[states_end:mines_end], 1, size)
+                if mines.count(1) != mines_count:
+                    raise ValueError(f"{path} does not hold {mines_count} mines")
+
+                return cls(
+                    BoardSettings(rows, columns, mines_count),
+                    seed,
+                    elapsed,
+                    bool(flags & UNTOUCHED),
+                    bool(flags & SAFE_FIRST_CLICK),
+                    bool(flags & NO_GUESS),
+                    mines,
+                    unpack(data[HEADER.size : states_end], 2, size),
+                )
@@ -0,0 +1,357 @@
+from collections import defaultdict
+from math import exp, lgamma, log
+from typing import Union
+
+from engine import Engine
+from square import SquareState
+
+
+def log_comb(n: int, k: int) -> float:
+    return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
+
+
+class Solver:
+    """
+    Deduces safe squares and mine probabilities of an Engine from the revealed
+    numbers only, flags placed by the player are not trusted,
+    single square rules run first, then constraints contained in other
+    constraints are subtracted, frontier components of at most max_enumeration
+    squares are enumerated for exact probabilities,
+    results are cached until another square is revealed"""
+
+    def __init__(self, engine: Engine, max_enumeration: int = 20):
+        self.engine = engine
+        self.max_enumeration = max_enumeration
+        self.solved_for = None
+
+        self.safe = set()
+        self.mines = set()
+        self.decided = set()
+        self.reduced = set()
+        self.compared = set()
+        self.probabilities = {}
+        self.interior_probability = 0.0
+        self.interior = 0
+
+    def solve(self):
+        engine = self.engine
+        solved_for = (engine.mines, engine.revealed_count)
+        if self.solved_for is not None and all(
+            a is b or a == b for a, b in zip(self.solved_for, solved_for)
+        ):
+            return
+        self.solved_for = solved_for
+
+        self.safe = set()
+        self.mines = set()
+        self.probabilities = {}
+        self.decided = set()
+        self.reduced = set()
+        self.compared = set()
+
+        constraints = self.get_constraints()
+        constraints = self.propagate(constraints)
+        self.enumerate(constraints)
+
+    def get_constraints(self) -> dict[frozenset, int]:
+        """Returns hidden neighbors of every revealed number with the mines among them"""
+
+        engine = self.engine
+        states, counts = engine.states, engine.counts
+        constraints = {}
+        for index in range(engine.size):
+            if states[index] != SquareState.REVEAL or not counts[index]:
+                continue
+            cells = frozenset(
+                n
+                for n in engine.get_neighbors(index)
+                if states[n] != SquareState.REVEAL
+            )
+            if cells:
+                constraints[cells] = counts[index]
+        return constraints
+
+    def propagate(self, constraints: dict[frozenset, int]) -> dict[frozenset, int]:
+        """
+        Applies the single square and the subset rules until nothing changes,
+        found squares are added to self.safe and self.mines,
+        returns the remaining undecided constraints"""
+
+        while True:
+            progress = False
+            decided = self.safe | self.mines
+            new, self.decided = decided - self.decided, decided
+
+            # Single square rules, constraints untouched by new squares stay as they are
+            reduced = {}
+            for cells, count in constraints.items():
+                if cells in self.reduced and cells.isdisjoint(new):
+                    reduced[cells] = count
+                    continue
+                count -= len(cells & self.mines)
+                cells = cells - self.mines - self.safe
+                if not cells:
+                    continue
+                if count == 0:
+                    self.safe |= cells
+                    progress = True
+                elif count == len(cells):
+                    self.mines |= cells
+                    progress = True
+                else:
+                    reduced[cells] = count
+            constraints = reduced
+            self.reduced = set(reduced)
+            if progress:
+                continue
+
+            # Subset rule, a constraint inside another one leaves the difference
+            by_cell = defaultdict(list)
+            for cells in constraints:
+                for cell in cells:
+                    by_cell[cell].append(cells)
+
+            # Pairs of constraints already compared are skipped
+            derived = {}
+            for cells, count in constraints.items():
+                if cells in self.compared:
+                    continue
+                others = {other for cell in cells for other in by_cell[cell]}
+                for other in others:
+                    if cells < other:
+                        difference = other - cells
+                        difference_count = constraints[other] - count
+                    elif other < cells:
+                        difference = cells - other
+                        difference_count = count - constraints[other]
+                    else:
+                        continue
+                    if difference not in constraints:
+                        derived[difference] = difference_count
+            self.compared = set(constraints)
+            if not derived:
+                return constraints
+            constraints.update(derived)
+
+    def get_components(
+        self, constraints: dict[frozenset, int]
+    ) -> list[list[frozenset]]:
+        """Groups constraints sharing squares together"""
+
+        by_cell = defaultdict(list)
+        for cells in constraints:
+            for cell in cells:
+                by_cell[cell].append(cells)
+
+        components = []
+        seen = set()
+        for start in constraints:
+            if start in seen:
+                continue
+            seen.add(start)
+            component, stack = [], [start]
+            while stack:
+                cells = stack.pop()
+                component.append(cells)
+                for cell in cells:
+                    for other in by_cell[cell]:
+                        if other not in seen:
+                            seen.add(other)
+                            stack.append(other)
+            components.append(component)
+        return components
+
+    def enumerate_component(
+        self, component: list[frozenset], constraints: dict[frozenset, int]
+    ) -> dict[int, tuple[int, dict[int, int]]]:
+        """
+        Enumerates every mine layout of a component,
+        returns {mines in layout: (number of layouts, {square: layouts with a mine})}"""
+
+        cells = sorted({cell for cells in component for cell in cells})
+        position = {cell: n for n, cell in enumerate(cells)}
+        remaining = [constraints[cells] for cells in component]
+        unassigned = [len(cells) for cells in component]
+        cell_constraints = [[] for _ in cells]
+        for n, constraint in enumerate(component):
+            for cell in constraint:
+                cell_constraints[position[cell]].append(n)
+
+        output = {}
+        assignment = [0] * len(cells)
+
+        def search(depth: int, mines: int):
+            if depth == len(cells):
+                layouts, cell_counts = output.get(mines, (0, [0] * len(cells)))
+                for n, mine in enumerate(assignment):
+                    cell_counts[n] += mine
+                output[mines] = (layouts + 1, cell_counts)
+                return
+
+            for mine in (0, 1):
+                valid = True
+                for n in cell_constraints[depth]:
+                    remaining[n] -= mine
+                    unassigned[n] -= 1
+                    if remaining[n] < 0 or remaining[n] > unassigned[n]:
+                        valid = False
+                if valid:
+                    assignment[depth] = mine
+                    search(depth + 1, mines + mine)
+                for n in cell_constraints[depth]:
+                    remaining[n] += mine
+                    unassigned[n] += 1
+
+        search(0, 0)
+        return {
+            mines: (layouts, dict(zip(cells, cell_counts)))
+            for mines, (layouts, cell_counts) in output.items()
+        }
+
+    def enumerate(self, constraints: dict[frozenset, int]):
+        """
+        Computes mine probabilities of the frontier and of the other hidden squares,
+        weighting component layouts by the ways to place the remaining mines"""
+
+        engine = self.engine
+        hidden = engine.size - engine.revealed_count - len(self.safe) - len(self.mines)
+        mines_left = engine.mines_count - len(self.mines)
+
+        components, approximated = [], {}
+        for component in self.get_components(constraints):
+            cells = {cell for cells in component for cell in cells}
+            if len(cells) <= self.max_enumeration:
+                components.append(self.enumerate_component(component, constraints))
+                hidden -= len(cells)
+            else:
+                # Too big to enumerate, the highest density of its constraints is used
+                for cells in component:
+                    density = constraints[cells] / len(cells)
+                    for cell in cells:
+                        approximated[cell] = max(approximated.get(cell, 0), density)
+
+        interior = self.interior = hidden - len(approximated)
+        mines_left -= round(sum(approximated.values()))
+        self.probabilities.update(approximated)
+
+        def interior_weight(mines: int) -> Union[float, None]:
+            rest = mines_left - mines
+            if rest < 0 or rest > interior:
+                return None
+            return log_comb(interior, rest)
+
+        # Log weights of the total frontier mine counts
+        weights = {}
+        for mines, log_layouts in convolve(components).items():
+            weight = interior_weight(mines)
+            if weight is not None:
+                weights[mines] = log_layouts + weight
+        if not weights:
+            self.interior_probability = mines_left / interior if interior > 0 else 0.0
+            return
+
+        top = max(weights.values())
+        total = sum(exp(weight - top) for weight in weights.values())
+        if interior:
+            expected = sum(
+                exp(weight - top) * (mines_left - mines)
+                for mines, weight in weights.items()
+            )
+            self.interior_probability = expected / total / interior
+
+        for n, component in enumerate(components):
+            others = convolve(components[:n] + components[n + 1 :])
+            cell_weights = defaultdict(float)
+            for mines, (_, cell_counts) in component.items():
+                for other_mines, log_others in others.items():
+                    weight = interior_weight(mines + other_mines)
+                    if weight is None:
+                        continue
+                    share = exp(log_others + weight - top)
+                    for cell, count in cell_counts.items():
+                        cell_weights[cell] += share * count
+
+            for cell in next(iter(component.values()))[1]:
+                probability = cell_weights[cell] / total
+                if probability < 1e-9:
+                    self.safe.add(cell)
+                elif probability > 1 - 1e-9:
+                    self.mines.add(cell)
+                else:
+                    self.probabilities[cell] = probability
+
+    def mine_probability(self, index: int) -> float:
+        """Probability of a mine under a hidden square"""
+
+        self.solve()
+        if index in self.safe or self.engine.states[index] == SquareState.REVEAL:
+            return 0.0
+        if index in self.mines:
+            return 1.0
+        return self.probabilities.get(index, self.interior_probability)
+
+    def mine_probabilities(self) -> dict[int, float]:
+        """Mine probabilities of the frontier, other hidden squares share interior_probability"""
+
+        self.solve()
+        output = dict(self.probabilities)
+        output.update(dict.fromkeys(self.safe, 0.0))
+        output.update(dict.fromkeys(self.mines, 1.0))
+        return output
+
+    def safe_moves(self) -> set[int]:
+        """Hidden squares which are certainly safe"""
+
+        self.solve()
+        return {i for i in self.safe if self.engine.states[i] != SquareState.REVEAL}
+
+    def next_move(self) -> Union[tuple[int, float], None]:
+        """
+        Returns the next square to reveal with its mine probability,
+        a certainly safe square if there is one, the least risky square otherwise"""
+
+        engine = self.engine
+        if engine.won or engine.lost:
+            return None
+        if engine.untouched:
+            return engine.rows // 2 * engine.columns + engine.columns // 2, 0.0
+
+        safe = self.safe_moves()
+        if safe:
+            return min(safe), 0.0
+
+        candidates = dict(self.probabilities)
+        if self.interior:
+            for index in range(engine.size):
+                if (
+                    engine.states[index] != SquareState.REVEAL
+                    and index not in candidates
+                    and index not in self.mines
+                ):
+                    candidates[index] = self.interior_probability
+                    break
+        if not candidates:
+            return None
+        index = min(candidates, key=candidates.get)
+        return index, candidates[index]
+
+
+def convolve(
+    components: list[dict[int, tuple[int, dict[int, int]]]],
+) -> dict[int, float]:
+    """Returns {total mines: log of the number of layouts} of independent components"""
+
+    total = {0: 0.0}
+    for component in components:
+        combined = {}
+        for a, log_a in total.items():
+            for b, (layouts, _) in component.items():
+                value = log_a + log(layouts)
+                previous = combined.get(a + b)
+                if previous is None:
+                    combined[a + b] = value
+                else:
+                    top = max(previous, value)
+                    combined[a + b] = top + log(exp(previous - top) + exp(value - top))
+        total = combined
+    return total
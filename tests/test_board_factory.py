@@ -0,0 +1,60 @@
+from board_factory import BoardFactory
+from constants import BoardSettings
+from generator import count_neighbors
+
+EXPERT = BoardSettings(16, 30, 99)
+BEGINNER = BoardSettings(10, 10, 10)
+
+
+def check_layout(layout, settings: BoardSettings):
+    assert layout.mines.count(1) == settings.mines_count
+    assert layout.counts == count_neighbors(
+        layout.mines, settings.rows, settings.columns
+    )
+
+
+def test_prepare_and_take():
+    factory = BoardFactory()
+    factory.prepare(EXPERT)
+
+    check_layout(factory.take(EXPERT), EXPERT)
+    # A layout is taken once, the next game prepares another one
+    assert factory.take(EXPERT) is None
+
+
+def test_prepare_keeps_the_pending_layout():
+    factory = BoardFactory()
+    factory.prepare(EXPERT)
+    pending = factory.pending
+    factory.prepare(EXPERT)
+
+    assert factory.pending is pending
+
+
+def test_other_settings():
+    factory = BoardFactory()
+    factory.prepare(EXPERT)
+
+    assert factory.take(BEGINNER) is None
+    factory.prepare(BEGINNER)
+    assert factory.take(EXPERT) is None
+    check_layout(factory.take(BEGINNER), BEGINNER)
+
+
+def test_cancel():
+    factory = BoardFactory()
+    factory.prepare(EXPERT)
+    factory.cancel()
+
+    assert factory.take(EXPERT) is None
+
+
+def test_worker_process():
+    factory = BoardFactory(max_inline=100)
+    try:
+        factory.prepare(EXPERT)
+        assert factory.executor is not None
+        check_layout(factory.take(EXPERT), EXPERT)
+    finally:
+        factory.close()
+    assert factory.executor is None
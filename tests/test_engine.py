@@ -0,0 +1,115 @@
+import pytest
+
+from engine import Engine
+from square import SquareEvent, SquareState
+
+ROWS, COLUMNS, MINES = 12, 15, 30
+
+
+def get_neighbors(index: int) -> list[int]:
+    row, column = divmod(index, COLUMNS)
+    return [
+        n_row * COLUMNS + n_column
+        for n_row in range(row - 1, row + 2)
+        for n_column in range(column - 1, column + 2)
+        if 0 <= n_row < ROWS and 0 <= n_column < COLUMNS
+        if (n_row, n_column) != (row, column)
+    ]
+
+
+def create_engine(seed: int) -> Engine:
+    engine = Engine(ROWS, COLUMNS, MINES, seed)
+    # The first click would move the mines away
+    engine.untouched = False
+    return engine
+
+
+def get_revealed(engine: Engine) -> set[int]:
+    return {i for i in range(engine.size) if engine.states[i] == SquareState.REVEAL}
+
+
+def reveal_slowly(engine: Engine, index: int) -> set[int]:
+    """Squares a reveal has to show, every empty square opens its neighbors"""
+
+    revealed, stack = set(), [index]
+    while stack:
+        index = stack.pop()
+        if index in revealed:
+            continue
+        revealed.add(index)
+        if not engine.mines[index] and not engine.counts[index]:
+            stack.extend(get_neighbors(index))
+    return revealed
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_flood_fill(seed):
+    engine = create_engine(seed)
+    for start in range(0, engine.size, 7):
+        if engine.mines[start]:
+            continue
+        engine.clear()
+        engine.reveal(start)
+
+        expected = reveal_slowly(engine, start)
+        assert get_revealed(engine) == expected
+        assert engine.revealed_count == len(expected)
+        assert not engine.lost
+
+
+def get_numbers(engine: Engine) -> list[int]:
+    """Revealed numbers with hidden neighbors after opening the first empty square"""
+
+    start = next(
+        i for i in range(engine.size) if not engine.mines[i] and not engine.counts[i]
+    )
+    engine.reveal(start)
+    return [
+        i
+        for i in get_revealed(engine)
+        if engine.counts[i]
+        and any(engine.states[n] != SquareState.REVEAL for n in get_neighbors(i))
+    ]
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("right_flags", [True, False])
+def test_chord(seed, right_flags):
+    for index in get_numbers(create_engine(seed)):
+        chorded, revealed = create_engine(seed), create_engine(seed)
+        get_numbers(chorded), get_numbers(revealed)
+
+        hidden = [
+            n for n in get_neighbors(index) if chorded.states[n] == SquareState.HIDE
+        ]
+        if right_flags:
+            flags = [n for n in hidden if chorded.mines[n]]
+        else:
+            flags = hidden[: chorded.counts[index]]
+        for engine in (chorded, revealed):
+            for n in flags:
+                engine.flag(n)
+
+        notified = []
+        chorded.subscribe(SquareEvent.REVEALED, notified.append)
+        chorded.chord(index)
+        for n in hidden:
+            if n not in flags:
+                revealed.reveal(n)
+
+        assert chorded.states == revealed.states
+        assert chorded.revealed_count == revealed.revealed_count
+        assert chorded.mine_hit == revealed.mine_hit
+        assert len(notified) == (len(flags) < len(hidden))
+        if right_flags:
+            assert not chorded.lost
+
+
+def test_chord_needs_matching_flags():
+    engine = create_engine(0)
+    index = get_numbers(engine)[0]
+    states = bytearray(engine.states)
+
+    engine.chord(index)
+
+    assert engine.states == states
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+# The game is drawn on a dummy display, no window is opened
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from atlas import Atlas
+from constants import BoardSettings, GameDifficulty
+from display_manager import DisplayManager
+from game import Game, GameImages, GameState
+from profiler import Profiler
+from replay import Replay, ReplayPlayer
+
+
+def create_game(**kwargs) -> Game:
+    pygame.init()
+    atlas = Atlas.load()
+    display_manager = DisplayManager(atlas["logo"])
+    atlas.convert()
+    return Game(display_manager, GameImages.from_atlas(atlas), **kwargs)
+
+
+@pytest.fixture
+def game(tmp_path) -> Game:
+    return create_game(snapshot_path=str(tmp_path / "game.mss"))
+
+
+def pick(game: Game, option: str):
+    """Picks an option of the Game menu as a click on it does"""
+
+    game.dbox_game.active_option = game.dbox_game_options.index(option)
+    game.dbox_game.pressed = True
+    game.update()
+
+
+def test_pick_difficulty(game):
+    pick(game, "Expert")
+
+    assert game.difficulty == GameDifficulty.EXPERT.value
+    assert not game.dbox_game.pressed
+
+
+def test_load_after_picking_a_difficulty(game):
+    pick(game, "Expert")
+    game.board.engine.reveal(0)
+    game.save_snapshot()
+    revealed_count = game.board.engine.revealed_count
+    pick(game, "Intermediate")
+
+    game.load_snapshot()
+    game.update()
+
+    assert game.difficulty == GameDifficulty.EXPERT.value
+    assert game.board.engine.revealed_count == revealed_count
+    assert game.game_state is not GameState.IDLE
+
+
+@pytest.mark.parametrize("replaying", [False, True])
+def test_scroll_finished_game(game, replaying):
+    game.change_dificulty(BoardSettings(200, 200, 4000))
+    engine = game.board.engine
+    engine.reveal(0)
+    if replaying:
+        game.replay_player = ReplayPlayer(Replay(game.difficulty, engine.seed))
+    else:
+        engine.reveal(engine.mines_locations[0])
+        assert game.game_state is GameState.LOST
+    scroll = list(game.board.scroll)
+
+    game.dispatch_events(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=-1))
+    assert game.board.scroll != scroll
+
+    # Clicks are not played
+    states = bytearray(engine.states)
+    position = game.board.view.center
+    for event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        game.dispatch_events(pygame.event.Event(event_type, button=1, pos=position))
+    assert engine.states == states
+
+
+@pytest.mark.parametrize("show_overlay", [False, True])
+def test_overlay(tmp_path, show_overlay):
+    # Tracing alone enables the profiler too
+    profiler = Profiler(True, trace_path=str(tmp_path / "trace.json"))
+    game = create_game(profiler=profiler, show_overlay=show_overlay)
+
+    assert (game.overlay is not None) == show_overlay
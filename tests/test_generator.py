@@ -0,0 +1,56 @@
+from random import Random
+
+import pytest
+
+from generator import count_neighbors, mine_indices, place_mines
+
+
+def count_neighbors_slowly(mines: bytearray, rows: int, columns: int) -> bytearray:
+    counts = bytearray(rows * columns)
+    for row in range(rows):
+        for column in range(columns):
+            counts[row * columns + column] = sum(
+                mines[n_row * columns + n_column]
+                for n_row in range(max(row - 1, 0), min(row + 2, rows))
+                for n_column in range(max(column - 1, 0), min(column + 2, columns))
+                if (n_row, n_column) != (row, column)
+            )
+    return counts
+
+
+@pytest.mark.parametrize(
+    "rows, columns", [(1, 1), (1, 9), (9, 1), (2, 2), (3, 7), (16, 30)]
+)
+@pytest.mark.parametrize("density", [0, 0.3, 1])
+def test_count_neighbors(rows, columns, density):
+    rng = Random(rows * 100 + columns)
+    mines = bytearray(rng.random() < density for _ in range(rows * columns))
+
+    assert count_neighbors(mines, rows, columns) == count_neighbors_slowly(
+        mines, rows, columns
+    )
+
+
+def test_mine_indices():
+    mines = place_mines(16, 30, 99, Random(1))
+    assert list(mine_indices(mines)) == [i for i in range(480) if mines[i]]
+
+
+@pytest.mark.parametrize("mines_count", [0, 10, 200, 391])
+def test_place_mines(mines_count):
+    exclude = [0, 1, 30, 31, 479]
+    mines = place_mines(16, 30, mines_count, Random(mines_count), exclude)
+
+    assert len(mines) == 480
+    assert mines.count(1) == mines_count
+    assert not any(mines[index] for index in exclude)
+
+
+def test_place_mines_is_seeded():
+    first = place_mines(16, 30, 99, Random(5))
+    assert place_mines(16, 30, 99, Random(5)) == first
+
+
+def test_place_mines_too_many():
+    with pytest.raises(ValueError):
+        place_mines(3, 3, 9, Random(0), exclude=[4])
@@ -0,0 +1,36 @@
+from random import Random
+
+import pytest
+
+import no_guess
+from engine import Engine
+
+
+def create_game(rows: int, columns: int, mines_count: int, seed: int) -> Engine:
+    engine = Engine(
+        rows, columns, mines_count, seed, layout_generator=no_guess.generate
+    )
+    engine.reveal(Random(seed).randrange(engine.size))
+    return engine
+
+
+@pytest.mark.parametrize("rows, columns, mines_count", [(9, 9, 10), (16, 30, 99)])
+@pytest.mark.parametrize("seed", range(10))
+def test_generate(rows, columns, mines_count, seed):
+    engine = create_game(rows, columns, mines_count, seed)
+    start = Random(seed).randrange(engine.size)
+
+    assert engine.mines.count(1) == mines_count
+    assert not any(engine.mines[index] for index in engine.get_safe_zone(start))
+    assert not engine.lost
+
+    # The layout is solved from the start square by the rules alone
+    player = no_guess.LogicPlayer(Engine(rows, columns, mines_count), start)
+    player.engine.set_mines(bytearray(engine.mines))
+    player.play()
+    assert player.engine.won
+
+
+def test_generate_is_seeded():
+    first = create_game(16, 16, 40, 3)
+    assert create_game(16, 16, 40, 3).mines == first.mines
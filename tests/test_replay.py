@@ -0,0 +1,130 @@
+from random import Random
+
+import pytest
+
+from constants import BoardSettings
+from engine import Engine
+from replay import (
+    HEADER,
+    MAGIC,
+    VERSION,
+    Move,
+    Outcome,
+    Replay,
+    ReplayWriter,
+    apply_move,
+    decode_varints,
+    encode_varint,
+    get_outcome,
+    verify_file,
+)
+
+
+def test_varints():
+    values = [0, 1, 127, 128, 300, 2**32 - 1, 2**40]
+    output = bytearray()
+    for value in values:
+        encode_varint(value, output)
+
+    assert decode_varints(output) == values
+
+
+def play(engine: Engine, writer: ReplayWriter, seed: int) -> list[tuple[Move, int]]:
+    """Random moves until the game ends or 40 moves are made, returns the moves"""
+
+    rng = Random(seed)
+    moves = []
+    while not (engine.won or engine.lost) and len(moves) < 40:
+        index = rng.randrange(engine.size)
+        move = rng.choice((Move.REVEAL, Move.REVEAL, Move.FLAG, Move.CHORD))
+        writer.write(move, index)
+        apply_move(engine, move, index)
+        moves.append((move, index))
+    writer.close()
+    return moves
+
+
+@pytest.mark.parametrize("no_guess", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(tmp_path, seed, no_guess):
+    path = str(tmp_path / "game.msr")
+    engine = Replay(BoardSettings(9, 9, 10), seed, no_guess=no_guess).create_engine()
+    moves = play(engine, ReplayWriter(path, engine, no_guess), seed)
+
+    replay = Replay.load(path)
+
+    assert (replay.settings.rows, replay.settings.columns) == (9, 9)
+    assert (replay.seed, replay.no_guess) == (seed, no_guess)
+    assert [(move, index) for move, index, _ in replay.moves] == moves
+    assert replay.outcome == get_outcome(engine)
+    assert replay.revealed_count == engine.revealed_count
+    assert replay.verify()
+
+
+def test_interrupted_game(tmp_path):
+    path = str(tmp_path / "game.msr")
+    engine = Engine(9, 9, 10, seed=3)
+    writer = ReplayWriter(path, engine)
+    writer.write(Move.FLAG, 40)
+    apply_move(engine, Move.FLAG, 40)
+    writer.file.close()
+
+    replay = Replay.load(path)
+
+    assert replay.moves == [(Move.FLAG, 40, 0)]
+    assert replay.outcome is None
+    assert replay.verify()
+
+
+def test_other_outcome_fails(tmp_path):
+    path = str(tmp_path / "game.msr")
+    engine = Engine(9, 9, 10, seed=3)
+    play(engine, ReplayWriter(path, engine), 3)
+
+    replay = Replay.load(path)
+    replay.outcome = Outcome.WON if replay.outcome != Outcome.WON else Outcome.LOST
+
+    assert not replay.verify()
+
+
+def get_replay_bytes(*steps: int) -> bytes:
+    """A 9x9 replay of flags moving by the steps, encoded as ReplayWriter does"""
+
+    data = bytearray(HEADER.pack(MAGIC, VERSION, 0, 9, 9, 10, 3))
+    for step in steps:
+        encode_varint(
+            (step << 1 if step >= 0 else -step * 2 - 1) << 2 | Move.FLAG, data
+        )
+        encode_varint(0, data)
+    return bytes(data)
+
+
+def test_bad_replays():
+    data = get_replay_bytes(40, 40)
+    assert [index for _, index, _ in Replay.from_bytes(data).moves] == [40, 80]
+
+    bad_replays = [
+        b"",
+        data[: HEADER.size - 1],
+        b"MSSN" + data[4:],
+        data[:4] + bytes([VERSION + 1]) + data[5:],
+        HEADER.pack(MAGIC, VERSION, 0, 9, 9, 82, 3),
+        # Moves past the last square and before the first one
+        get_replay_bytes(40, 41),
+        get_replay_bytes(-1),
+    ]
+    for bad_replay in bad_replays:
+        with pytest.raises(ValueError):
+            Replay.from_bytes(bad_replay)
+
+
+def test_verify_file(tmp_path):
+    path = str(tmp_path / "game.msr")
+    engine = Engine(9, 9, 10, seed=3)
+    play(engine, ReplayWriter(path, engine), 3)
+    assert verify_file(path) is None
+
+    with open(path, "r+b") as file:
+        file.truncate(HEADER.size - 1)
+    assert verify_file(path).startswith("cannot be read")
+    assert verify_file(str(tmp_path / "missing.msr")).startswith("cannot be read")
@@ -0,0 +1,109 @@
+from random import Random
+
+import pytest
+
+from engine import Engine
+from snapshot import HEADER, Snapshot, pack, unpack
+
+
+@pytest.mark.parametrize("bits", [1, 2])
+@pytest.mark.parametrize("size", [0, 1, 7, 8, 9, 33])
+def test_pack(bits, size):
+    rng = Random(size)
+    values = bytes(rng.randrange(1 << bits) for _ in range(size))
+
+    packed = pack(values, bits)
+
+    assert len(packed) == -(-size * bits // 8)
+    assert unpack(packed, bits, size) == values
+
+
+def create_game() -> Engine:
+    engine = Engine(20, 25, 60, seed=4)
+    engine.reveal(250)
+    for index in range(0, engine.size, 13):
+        engine.flag(index)
+    return engine
+
+
+@pytest.mark.parametrize("no_guess", [False, True])
+def test_round_trip(tmp_path, no_guess):
+    path = str(tmp_path / "game.mss")
+    engine = create_game()
+    Snapshot.capture(engine, 42, no_guess).save(path)
+
+    snapshot = Snapshot.load(path)
+    restored = Engine(20, 25, 60)
+    snapshot.restore(restored)
+
+    assert (snapshot.elapsed, snapshot.no_guess, snapshot.untouched) == (
+        42,
+        no_guess,
+        False,
+    )
+    assert restored.mines == engine.mines
+    assert restored.counts == engine.counts
+    assert restored.states == engine.states
+    assert restored.seed == engine.seed
+    assert (restored.revealed_count, restored.flagged_count, restored.lost) == (
+        engine.revealed_count,
+        engine.flagged_count,
+        engine.lost,
+    )
+
+
+def test_lost_game(tmp_path):
+    path = str(tmp_path / "game.mss")
+    engine = create_game()
+    engine.reveal(engine.mines_locations[0])
+    Snapshot.capture(engine, 7, False).save(path)
+
+    restored = Engine(20, 25, 60)
+    Snapshot.load(path).restore(restored)
+
+    assert restored.lost
+    assert restored.states == engine.states
+
+
+def test_untouched_game(tmp_path):
+    path = str(tmp_path / "game.mss")
+    engine = Engine(20, 25, 60, seed=9)
+    engine.flag(3)
+    engine.flag(40)
+    Snapshot.capture(engine, 0, False).save(path)
+
+    restored = Engine(20, 25, 60)
+    Snapshot.load(path).restore(restored)
+
+    assert restored.untouched
+    assert restored.mines == engine.mines
+    assert restored.states == engine.states
+    assert restored.flagged_count == 2
+
+    # The first click still moves the mines out of its safe zone
+    restored.reveal(250)
+    engine.reveal(250)
+    assert restored.mines == engine.mines
+
+
+def test_bad_files(tmp_path):
+    path = tmp_path / "game.mss"
+    Snapshot.capture(create_game(), 1, False).save(str(path))
+    data = path.read_bytes()
+    mines_length = -(-500 // 8)
+    bad_files = [
+        b"",
+        data[: HEADER.size - 1],
+        data[:-1],
+        data + b"\0",
+        data[:4] + bytes([data[4] + 1]) + data[5:],
+        data[:-mines_length] + bytes(mines_length),
+    ]
+
+    for bad_file in bad_files:
+        path.write_bytes(bad_file)
+        with pytest.raises(ValueError):
+            Snapshot.load(str(path))
+
+    with pytest.raises(OSError):
+        Snapshot.load(str(tmp_path / "missing.mss"))
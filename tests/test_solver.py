@@ -0,0 +1,75 @@
+from itertools import combinations
+from random import Random
+
+import pytest
+
+from engine import Engine
+from solver import Solver
+from square import SquareState
+
+
+def create_game(seed: int) -> Engine:
+    """
+    A tiny board with a few safe squares revealed, small enough to enumerate,
+    boards won by the reveals are drawn again so hidden squares always remain"""
+
+    rng = Random(seed)
+    while True:
+        engine = Engine(
+            rng.randint(3, 5), rng.randint(3, 5), rng.randint(2, 6), rng.getrandbits(32)
+        )
+        engine.reveal(rng.randrange(engine.size))
+        for _ in range(rng.randint(0, 3)):
+            safe = [
+                i
+                for i in range(engine.size)
+                if not engine.mines[i] and engine.states[i] != SquareState.REVEAL
+            ]
+            if safe:
+                engine.reveal(rng.choice(safe))
+        if not engine.won:
+            return engine
+
+
+def enumerate_probabilities(engine: Engine) -> dict[int, float]:
+    """Mine probability of every hidden square over all layouts matching the numbers"""
+
+    states = engine.states
+    hidden = [i for i in range(engine.size) if states[i] != SquareState.REVEAL]
+    numbers = [i for i in range(engine.size) if states[i] == SquareState.REVEAL]
+    layouts = 0
+    mines = dict.fromkeys(hidden, 0)
+    for layout in combinations(hidden, engine.mines_count):
+        layout = set(layout)
+        if all(
+            sum(n in layout for n in engine.get_neighbors(i)) == engine.counts[i]
+            for i in numbers
+        ):
+            layouts += 1
+            for index in layout:
+                mines[index] += 1
+    return {index: count / layouts for index, count in mines.items()}
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_probabilities(seed):
+    engine = create_game(seed)
+    solver = Solver(engine)
+
+    for index, probability in enumerate_probabilities(engine).items():
+        assert solver.mine_probability(index) == pytest.approx(probability, abs=1e-9)
+
+
+@pytest.mark.parametrize("max_enumeration", [0, 4])
+@pytest.mark.parametrize("seed", range(60))
+def test_rules_without_enumeration(seed, max_enumeration):
+    """Squares decided with approximated probabilities are still certain"""
+
+    engine = create_game(seed)
+    solver = Solver(engine, max_enumeration=max_enumeration)
+    probabilities = enumerate_probabilities(engine)
+
+    for index in solver.safe_moves():
+        assert probabilities[index] == 0
+    for index in solver.mines:
+        assert probabilities[index] == 1
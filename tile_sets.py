@@ -0,0 +1,44 @@
+from collections import OrderedDict
+from dataclasses import fields, replace
+
+import pygame
+
+
+class TileSets:
+    """
+    Copies of a dataclass of sprites scaled by a factor, generated on demand,
+    every field holds a surface or a list of surfaces,
+    at most max_sets scaled copies are kept, least recently used go first,
+    the original sprites serve the scale 1 and are not counted"""
+
+    def __init__(self, images, max_sets: int = 4):
+        self.images = images
+        self.max_sets = max_sets
+        self.sets = OrderedDict()
+
+    def get(self, scale: float):
+        if scale == 1:
+            return self.images
+
+        images = self.sets.get(scale)
+        if images is None:
+            images = self.sets[scale] = self.scale(scale)
+            if len(self.sets) > self.max_sets:
+                self.sets.popitem(last=False)
+        else:
+            self.sets.move_to_end(scale)
+        return images
+
+    def scale(self, scale: float):
+        def scaled(value):
+            if isinstance(value, pygame.Surface):
+                return pygame.transform.scale_by(value, scale)
+            return [pygame.transform.scale_by(surface, scale) for surface in value]
+
+        return replace(
+            self.images,
+            **{
+                field.name: scaled(getattr(self.images, field.name))
+                for field in fields(self.images)
+            },
+        )
@@ -7,11 +7,13 @@ class Timer:
         self.counting = 0
         self.running = False
 
-    def start(self):
+    def start(self, offset: float = 0):
+        """offset - seconds already counted, a restored game continues from them"""
+
         self.started_at = 0
-        self.counting = 0
+        self.counting = round(offset)
         if not self.running:
-            self.started_at = time.time()
+            self.started_at = time.time() - offset
             self.running = not self.running
 
     def end(self):
@@ -11,12 +11,14 @@ class TimerCountImages:
 
 
 class Timer:
-    def __init__(self, sprites: TimerCountImages):
+    def __init__(self, sprites: TimerCountImages, scale: float = 1):
         self.sprites = sprites
+        self.scale = scale
         self.timer = timer.Timer()
+        self.drawn_count = None
 
-    def start(self):
-        self.timer.start()
+    def start(self, offset: float = 0):
+        self.timer.start(offset)
 
     def end(self):
         self.timer.end()
@@ -28,18 +30,56 @@ class Timer:
     def update(self):
         self.timer.update()
 
-    def draw(self, screen):
+    def draw(self, screen, force: bool = False) -> list[pygame.Rect]:
+        if not force and self.drawn_count == self.timer.counting:
+            return []
+        self.drawn_count = self.timer.counting
+
         width = screen.get_width()
         x = 0
+        rects = []
         for n, index in enumerate(str(self.timer.counting).zfill(3)):
             try:
                 surf = self.sprites.digits[int(index)]
             except ValueError:
                 surf = self.sprites.minus
-            rect_obj = surf.get_rect(topleft=(width - 65, 36))
-            rect_obj.left += 12 + x
-            screen.blit(surf, rect_obj)
+            rect_obj = surf.get_rect(
+                topleft=(width + round((x - 53) * self.scale), round(36 * self.scale))
+            )
+            rects.append(screen.blit(surf, rect_obj))
             x += 13
+        return rects
+
+
+class TextCache:
+    """
+    Rendered text surfaces shared by all widgets,
+    keyed by the font, text, antialias and color,
+    entries of a font are dropped with invalidate when the font changes"""
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def render(
+        self,
+        font: pygame.Font,
+        text: str,
+        antialias: bool,
+        color: tuple[int, int, int],
+    ) -> pygame.Surface:
+        key = (font, text, antialias, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = font.render(text, antialias, color)
+        return surface
+
+    def invalidate(self, font: pygame.Font):
+        self.surfaces = {
+            key: surface for key, surface in self.surfaces.items() if key[0] is not font
+        }
+
+
+text_cache = TextCache()
 
 
 class DropBox:
@@ -61,6 +101,19 @@ class DropBox:
         self.menu_active = False
         self.active_option = -1
         self.pressed = False
+        self.drawn_header = None
+        self.drawn_menu = None
+
+    @property
+    def font(self) -> pygame.Font:
+        return self._font
+
+    @font.setter
+    def font(self, font: pygame.Font):
+        if getattr(self, "_font", None) is not None:
+            text_cache.invalidate(self._font)
+        self._font = font
+        self.drawn_header = self.drawn_menu = None
 
     def get_options_rects(self) -> dict[str : pygame.Rect]:
         output = {}
@@ -99,21 +152,32 @@ class DropBox:
         if not self.menu_active and self.active_option == -1:
             self.draw_menu = False
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.colors[self.menu_active], self.rect, 0)
-        text = self.font.render(self.main, True, (0, 0, 0))
-        screen.blit(text, text.get_rect(center=self.rect.center))
-
-        if self.draw_menu:
-            for n, text in enumerate(self.options):
-                rect = self.rect.copy()
-                rect.w = self.rect.w * 2
-                rect.y += (n + 1) * self.rect.height
+    def draw(self, screen, force: bool = False) -> list[pygame.Rect]:
+        """
+        Draws the header and the open menu when their look changed since the last
+        draw, returns a list[pygame.Rect] of the updated screen areas,
+        closing the menu needs the covered area redrawn by the caller"""
+
+        rects = []
+        if force or self.drawn_header != self.menu_active:
+            self.drawn_header = self.menu_active
+            pygame.draw.rect(screen, self.colors[self.menu_active], self.rect, 0)
+            text = text_cache.render(self.font, self.main, True, Colors.text_color)
+            screen.blit(text, text.get_rect(center=self.rect.center))
+            rects.append(self.rect)
+
+        menu = self.active_option if self.draw_menu else None
+        if self.draw_menu and (force or self.drawn_menu != menu):
+            for n, (text, rect) in enumerate(self.options_rects.items()):
                 pygame.draw.rect(
                     screen, self.colors[1 if n == self.active_option else 0], rect, 0
                 )
-                text = self.font.render(text, True, (0, 0, 0))
+                text = text_cache.render(self.font, text, True, Colors.text_color)
                 screen.blit(text, text.get_rect(center=rect.center))
+                rects.append(rect)
+        self.drawn_menu = menu
+
+        return rects
 
 
 @dataclass
@@ -123,10 +187,12 @@ class MineCountImages:
 
 
 class MineCounter:
-    def __init__(self, mine_count: int, sprites: MineCountImages):
+    def __init__(self, mine_count: int, sprites: MineCountImages, scale: float = 1):
         self.original_count = mine_count
         self.mine_count = mine_count
         self.sprites = sprites
+        self.scale = scale
+        self.drawn_count = None
 
     def reset(self):
         self.mine_count = self.original_count
@@ -134,15 +200,22 @@ class MineCounter:
     def update(self, marked_count):
         self.mine_count = marked_count
 
-    def draw(self, screen):
+    def draw(self, screen, force: bool = False) -> list[pygame.Rect]:
+        if not force and self.drawn_count == self.mine_count:
+            return []
+        self.drawn_count = self.mine_count
+
         x = 0
+        rects = []
         for index in str(self.mine_count).zfill(3):
             try:
                 surf = self.sprites.digits[int(index)]
             except ValueError:
                 surf = self.sprites.minus
 
-            rect_obj = surf.get_rect(topleft=(10, 36))
-            rect_obj.left += 7 + x
-            screen.blit(surf, rect_obj)
+            rect_obj = surf.get_rect(
+                topleft=(round((17 + x) * self.scale), round(36 * self.scale))
+            )
+            rects.append(screen.blit(surf, rect_obj))
             x += 13
+        return rects